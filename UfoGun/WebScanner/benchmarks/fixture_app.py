@@ -0,0 +1,159 @@
+"""
+Local stand-in target for the scan benchmarks: a small catalog site with a
+configurable number of pages and forms and one known-vulnerable endpoint per
+check (XSS, SQLi, LFI, SSTI, open redirect, form XSS). `expected` lists the
+findings a scan should report; /safe and the subscribe forms must report
+nothing.
+"""
+import html
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# (finding title, route path, parameter) the scanner should report against this app
+EXPECTED_FINDINGS = {
+    ("Reflected XSS (URL)", "/search", "q"),
+    ("SQL Injection (Error Based)", "/product", "id"),
+    ("Local File Inclusion (LFI)", "/view", "file"),
+    ("Server-Side Template Injection (SSTI)", "/greet", "name"),
+    ("Open Redirect", "/redirect", "url"),
+    ("Reflected XSS (Form Method: POST)", "/comment", None),
+}
+
+# Titles of the active checks, used to tell false positives from informational findings
+INJECTION_TITLES = (
+    "Reflected XSS", "SQL Injection", "Local File Inclusion", "Command Injection",
+    "Server-Side Template Injection", "Open Redirect"
+)
+
+
+class FixtureApp:
+    """
+    Threaded HTTP server on 127.0.0.1 with a thread-safe request counter.
+    """
+
+    def __init__(self, pages=50, forms=10, latency=0.005):
+        self.pages = max(1, pages)
+        self.forms = max(1, forms)
+        self.latency = latency
+        self.requests = 0
+        self.expected = set(EXPECTED_FINDINGS)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        app = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body leave in one write; separate small writes stall on Nagle / delayed ACK
+            wbufsize = 64 * 1024
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self.handle_request(head=True)
+
+            def do_GET(self):
+                self.handle_request()
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self.handle_request(body=self.rfile.read(length).decode('utf-8', 'ignore'))
+
+            def handle_request(self, head=False, body=None):
+                app.count()
+                if app.latency:
+                    time.sleep(app.latency)
+                status, headers, content = app.route(self.command, self.path, body)
+                data = content.encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def reset_count(self):
+        with self._lock:
+            self.requests = 0
+
+    def page(self, n):
+        links = ''.join(f'<a href="/page/{k}">Page {k}</a> ' for k in (n - 1, n + 1) if 0 <= k < self.pages)
+        links += (f'<a href="/product?id={n}">Product {n}</a> '
+                  f'<a href="/search?q=item{n}">Search</a> '
+                  f'<a href="/view?file=page{n}.txt">View</a> '
+                  f'<a href="/greet?name=user{n}">Greet</a> '
+                  f'<a href="/redirect?url=/page/{n}">Back</a> '
+                  f'<a href="/safe?q=item{n}">Safe</a>')
+        forms = ''
+        for i in range(n, self.forms, self.pages):
+            if i == 0:
+                forms += '<form action="/comment" method="post"><input name="comment" type="text"></form>'
+            else:
+                forms += f'<form action="/subscribe" method="post"><input name="email" type="email"><input name="list" type="hidden" value="{i}"></form>'
+        return f'<html><head><title>Page {n}</title></head><body><h1>Page {n}</h1>{links}{forms}</body></html>'
+
+    def route(self, method, path, body=None):
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        form = parse_qs(body or '')
+        value = lambda source, name: source.get(name, [''])[0]
+
+        if parsed.path == '/':
+            index = ''.join(f'<a href="/page/{n}">Page {n}</a> ' for n in range(self.pages))
+            return 200, {}, f'<html><body><h1>Catalog</h1>{index}{self.page(0)}</body></html>'
+        if parsed.path.startswith('/page/'):
+            try:
+                n = int(parsed.path.rsplit('/', 1)[-1])
+            except ValueError:
+                n = -1
+            if 0 <= n < self.pages:
+                return 200, {}, self.page(n)
+        if parsed.path == '/search':
+            # Reflected XSS
+            return 200, {}, f'<html><body>Results for {value(query, "q")}</body></html>'
+        if parsed.path == '/product':
+            # Error-based SQL injection
+            if "'" in value(query, 'id') or '"' in value(query, 'id'):
+                return 500, {}, '<html><body>You have an error in your SQL syntax near the input</body></html>'
+            return 200, {}, f'<html><body>Product {html.escape(value(query, "id"))}</body></html>'
+        if parsed.path == '/view':
+            # Path traversal
+            name = value(query, 'file')
+            if '..' in name and 'etc/passwd' in name:
+                return 200, {}, '<pre>root:x:0:0:root:/root:/bin/bash</pre>'
+            return 200, {}, f'<html><body>File {html.escape(name)}</body></html>'
+        if parsed.path == '/greet':
+            # Template injection (escaped, so not XSS)
+            name = value(query, 'name').replace('{{7*7}}', '49')
+            return 200, {}, f'<html><body>Hello {html.escape(name)}</body></html>'
+        if parsed.path == '/redirect':
+            # Open redirect
+            return 302, {'Location': value(query, 'url') or '/'}, ''
+        if parsed.path == '/safe':
+            return 200, {}, f'<html><body>Results for {html.escape(value(query, "q"))}</body></html>'
+        if parsed.path == '/comment' and method == 'POST':
+            return 200, {}, f'<html><body>Thanks for: {value(form, "comment")}</body></html>'
+        if parsed.path == '/subscribe':
+            return 200, {}, f'<html><body>Subscribed {html.escape(value(form, "email"))}</body></html>'
+        return 404, {}, '<html><body>Not Found</body></html>'
@@ -0,0 +1,155 @@
+"""
+Scan benchmark: runs AdvancedScanner.perform_scan and the full /api/scan job
+(server.scan_target) against the local fixture app and records wall time,
+requests sent, requests per second, peak memory (tracemalloc) and findings
+recall / precision. Results are printed as JSON; --output saves them and --compare
+prints the change against an earlier result file.
+
+Usage: python benchmarks/scan_bench.py [--pages 50] [--forms 10] [--latency-ms 5]
+                                       [--runs 3] [--output FILE] [--compare FILE]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from urllib.parse import urlparse
+import tempfile
+import statistics
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+# --output / --compare paths are relative to where the benchmark was started
+START_DIR = os.getcwd()
+
+# database creates webscanner.db in the working directory on import; keep it out of the tree
+WORKDIR = tempfile.mkdtemp(prefix="ufogun-bench-")
+os.chdir(WORKDIR)
+import database
+import server
+from vulnerability_scanner import AdvancedScanner
+from fixture_app import FixtureApp, INJECTION_TITLES
+
+# Every run must do the full amount of work
+database.update_setting("incremental_rescan", "false")
+
+JOB_TIMEOUT = 600
+
+
+def found_findings(vulns):
+    # Keyed on the route too: the same parameter name on another route is a different finding
+    found = set()
+    for v in vulns:
+        if v.get("title", "").startswith(INJECTION_TITLES):
+            found.add((v["title"], urlparse(v.get("path") or "").path, v.get("param")))
+    return found
+
+
+def run_perform_scan(base_url):
+    return AdvancedScanner().perform_scan(base_url)
+
+
+def run_scan_target(base_url):
+    client = server.app.test_client()
+    response = client.post('/api/scan', json={"url": base_url})
+    job_id = response.get_json()["jobId"]
+    deadline = time.time() + JOB_TIMEOUT
+    while time.time() < deadline:
+        job = client.get(f'/api/scan/{job_id}').get_json()
+        if job["status"] not in ("queued", "running"):
+            if job["status"] != "done":
+                raise RuntimeError(f"scan job ended as {job['status']}: {job.get('error')}")
+            return job["results"]["vulnerabilities"]
+        time.sleep(0.05)
+    raise RuntimeError("scan job timed out")
+
+
+def measure(app, base_url, scan, runs):
+    timings = []
+    requests_sent = 0
+    vulns = []
+    for _ in range(runs):
+        app.reset_count()
+        start = time.perf_counter()
+        vulns = scan(base_url)
+        timings.append(time.perf_counter() - start)
+        requests_sent = app.requests
+
+    # Separate traced run: tracemalloc slows allocation-heavy code down too much to time it
+    tracemalloc.start()
+    scan(base_url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall = statistics.median(timings)
+    found = found_findings(vulns)
+    return {
+        "wall_s": round(wall, 3),
+        "wall_s_runs": [round(t, 3) for t in timings],
+        "requests": requests_sent,
+        "requests_per_s": round(requests_sent / wall, 1) if wall else None,
+        "peak_memory_kb": round(peak / 1024),
+        "findings": len(vulns),
+        "recall": round(len(found & app.expected) / len(app.expected), 3),
+        "precision": round(len(found & app.expected) / len(found), 3) if found else None,
+        "missed": sorted(f"{title} {route} [{param}]" for title, route, param in app.expected - found),
+        "false_positives": sorted(f"{title} {route} [{param}]" for title, route, param in found - app.expected)
+    }
+
+
+def compare(current, previous):
+    lines = []
+    for mode, result in current["results"].items():
+        before = previous.get("results", {}).get(mode)
+        if not before:
+            continue
+        for metric in ("wall_s", "requests", "requests_per_s", "peak_memory_kb", "recall", "precision"):
+            old, new = before.get(metric), result.get(metric)
+            if old in (None, 0) or new is None:
+                continue
+            lines.append(f"{mode:14} {metric:15} {old:>10} -> {new:>10} ({(new - old) / old * 100:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scanner benchmark against a local fixture app")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--forms", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="server-side delay per request")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    app = FixtureApp(pages=args.pages, forms=args.forms, latency=args.latency_ms / 1000.0)
+    base_url = app.start()
+    try:
+        results = {
+            "perform_scan": measure(app, base_url, run_perform_scan, args.runs),
+            "scan_target": measure(app, base_url, run_scan_target, args.runs)
+        }
+    finally:
+        app.stop()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {"pages": args.pages, "forms": args.forms, "latency_ms": args.latency_ms, "runs": args.runs},
+        "results": results
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(os.path.join(START_DIR, args.output), "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(os.path.join(START_DIR, args.compare)) as f:
+            print(compare(report, json.load(f)))
+
+
+if __name__ == "__main__":
+    main()
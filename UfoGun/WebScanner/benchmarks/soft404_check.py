@@ -0,0 +1,99 @@
+"""
+Soft-404 regression check: runs content discovery (admin paths and sensitive
+files) against local catch-all sites that answer every path with 200 and echo
+the requested path back, once per hash seed, and expects no hits. Exits with
+status 1 when any seed reports a path.
+
+Usage: python benchmarks/soft404_check.py [--seeds 8]
+"""
+import os
+import sys
+import html
+import argparse
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from http_client import create_session, ResponseCache
+from discovery import ContentDiscovery, ADMIN_WORDLIST, SENSITIVE_WORDLIST, iter_paths
+
+# Ways catch-all pages echo the requested path
+ECHO_PAGES = {
+    "raw": '<html><body><h1>Shop</h1>Sorry, {path} was not found.</body></html>',
+    "escaped": '<html><head><title>{name}</title></head><body>Nothing at {path_html} ({name})</body></html>',
+    "link": '<html><body><a href="{path}">{path}</a> does not exist; try <a href="/">home</a>.</body></html>',
+}
+
+
+def start_catch_all(page):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        wbufsize = 64 * 1024
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = unquote(urlparse(self.path).path)
+            name = path.rstrip('/').rsplit('/', 1)[-1]
+            data = page.format(path=path, path_html=html.escape(path), name=name).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def check_once():
+    """
+    Discovery hits on every catch-all variant, as "variant: path" strings.
+    """
+    hits = []
+    for variant, page in ECHO_PAGES.items():
+        server, base_url = start_catch_all(page)
+        try:
+            discovery = ContentDiscovery(create_session(cache=ResponseCache()))
+            for hit in discovery.run(base_url, iter_paths(ADMIN_WORDLIST), statuses=(200, 403), allow_redirects=True):
+                hits.append(f"{variant}: {hit.path}")
+            for hit in discovery.run(base_url, iter_paths(SENSITIVE_WORDLIST)):
+                hits.append(f"{variant}: {hit.path}")
+        finally:
+            server.shutdown()
+            server.server_close()
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soft-404 check against path-echoing catch-all sites")
+    parser.add_argument("--seeds", type=int, default=8, help="PYTHONHASHSEED values 1..N to run under")
+    parser.add_argument("--once", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.once:
+        print("\n".join(check_once()))
+        return 0
+
+    failed = False
+    for seed in range(1, args.seeds + 1):
+        env = dict(os.environ, PYTHONHASHSEED=str(seed))
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--once"], env=env,
+                                capture_output=True, text=True)
+        hits = [line for line in result.stdout.splitlines() if line]
+        if result.returncode != 0 or hits:
+            failed = True
+        status = "ok" if result.returncode == 0 and not hits else "FAIL"
+        print(f"seed {seed}: {status} {', '.join(hits)}{result.stderr.strip()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
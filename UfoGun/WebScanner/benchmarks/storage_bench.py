@@ -0,0 +1,89 @@
+"""
+Report storage benchmark: database size and get_report_detail latency for
+plain JSON payloads versus the compressed format.
+
+Usage: python benchmarks/storage_bench.py [reports] [findings_per_report]
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# database creates webscanner.db in the working directory on import; keep it out of the tree
+WORKDIR = tempfile.mkdtemp(prefix="ufogun-bench-")
+os.chdir(WORKDIR)
+import database
+
+
+def make_report(index, findings):
+    host = f"http://target{index % 17}.example.com"
+    vulns = []
+    for i in range(findings):
+        page = f"/catalog/item?id={i}&ref=%3Cscript%3Ealert%28%27XSS%27%29%3C%2Fscript%3E&page={i % 9}"
+        vulns.append({
+            "title": random.choice(["Reflected XSS (URL)", "SQL Injection (Error Based)", "Eksik Header: X-Frame-Options"]),
+            "severity": random.choice(["critical", "high", "medium", "low", "info"]),
+            "desc": f"URL parameter 'ref' reflects input without sanitization. Payload #{i}",
+            "path": host + page
+        })
+    logs = [f"SCAN STARTED: {host}", "Initiating Port Scan (Top 20)..."]
+    logs += [f"Probing {host}/catalog/item?id={i}" for i in range(findings * 3)]
+    return host, {"url": host, "logs": logs, "vulnerabilities": vulns}
+
+
+def db_size(path):
+    return sum(os.path.getsize(path + s) for s in ("", "-wal") if os.path.exists(path + s))
+
+
+def run(reports, findings):
+    payloads = [make_report(i, findings) for i in range(reports)]
+    results = {}
+
+    for mode in ("plain", "compressed"):
+        database.DB_NAME = os.path.join(WORKDIR, f"{mode}.db")
+        database.init_db()
+        for url, data in payloads:
+            data_json = json.dumps(data)
+            if mode == "plain":
+                # Old layout: payload stored as plain TEXT
+                conn = sqlite3.connect(database.DB_NAME)
+                conn.execute("INSERT INTO reports (url, date, vuln_count, data) VALUES (?, '2025-01-01 00:00:00', ?, ?)",
+                             (url, len(data["vulnerabilities"]), data_json))
+                conn.commit()
+                conn.close()
+            else:
+                database.add_report(url, len(data["vulnerabilities"]), data_json, findings=[])
+
+        # Flush the WAL so the file size reflects the stored data
+        database._write(lambda conn: None)
+        with database.reader() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        timings = []
+        for report_id in range(1, reports + 1):
+            start = time.perf_counter()
+            detail = database.get_report_detail(report_id)
+            json.loads(detail["data"])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        results[mode] = {
+            "db_bytes": db_size(database.DB_NAME),
+            "read_ms_median": round(statistics.median(timings), 3),
+            "read_ms_p95": round(sorted(timings)[int(len(timings) * 0.95) - 1], 3)
+        }
+        database.close_connections()
+
+    results["size_reduction"] = round(1 - results["compressed"]["db_bytes"] / results["plain"]["db_bytes"], 3)
+    return results
+
+
+if __name__ == "__main__":
+    reports = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    findings = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    print(json.dumps(run(reports, findings), indent=2))
@@ -0,0 +1,78 @@
+import time
+import threading
+import requests
+
+
+class BudgetExceeded(requests.exceptions.RequestException):
+    """
+    Raised instead of sending a request once the scan's deadline or request budget is used up.
+    It is a RequestException, so checks that tolerate failed requests simply stop getting answers.
+    """
+
+
+class ScanBudget:
+    """
+    Scan-wide deadline and request budget.
+    CachedSession calls consume() before every request that goes to the
+    network and shortens request timeouts to the time left; the scan loops
+    poll `exhausted` and stop, so the scan ends with partial results instead
+    of running on against a slow host.
+    """
+
+    def __init__(self, timeout=None, max_requests=None):
+        self.timeout = timeout
+        self.max_requests = max_requests
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout else None
+        self.requests = 0
+        self.reason = None
+        self._lock = threading.Lock()
+
+    def remaining_time(self):
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    @property
+    def exhausted(self):
+        if self.reason is None:
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.reason = "deadline"
+            elif self.max_requests and self.requests >= self.max_requests:
+                self.reason = "request_budget"
+        return self.reason is not None
+
+    def check(self):
+        if self.exhausted:
+            raise BudgetExceeded(self.describe())
+
+    def consume(self):
+        """
+        Takes one request from the budget, raising BudgetExceeded when none is left.
+        """
+        with self._lock:
+            self.check()
+            self.requests += 1
+
+    def clamp_timeout(self, timeout):
+        remaining = self.remaining_time()
+        if remaining is None or not isinstance(timeout, (int, float)):
+            return timeout
+        return max(0.1, min(timeout, remaining))
+
+    def describe(self):
+        if self.reason == "deadline":
+            return f"scan deadline of {self.timeout:.0f}s reached"
+        if self.reason == "request_budget":
+            return f"request budget of {self.max_requests} requests used up"
+        return "budget available"
+
+    def to_dict(self):
+        return {
+            "timeout_s": self.timeout,
+            "max_requests": self.max_requests,
+            "requests": self.requests,
+            "elapsed_s": round(time.monotonic() - self.started, 3),
+            "exhausted": self.exhausted,
+            "reason": self.reason
+        }
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import concurrent.futures
+from collections import deque
+from urllib.parse import urlparse
+from page_document import get_document
+from urlnorm import canonicalize, UrlClusters
+from metrics import session_check
+
+STATIC_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.css', '.js', '.pdf')
+
+
+def content_hash(text):
+    return hashlib.sha1((text or '').encode('utf-8', 'ignore')).hexdigest()
+
+
+def conditional_get(session, url, previous=None, timeout=5):
+    """
+    GETs url, revalidating against the state stored by the previous scan
+    (If-None-Match / If-Modified-Since). Returns (response, unchanged): a 304
+    or a body with the same content hash counts as unchanged.
+    """
+    headers = {}
+    if previous:
+        if previous.get("etag"):
+            headers['If-None-Match'] = previous["etag"]
+        if previous.get("last_modified"):
+            headers['If-Modified-Since'] = previous["last_modified"]
+    response = session.get(url, timeout=timeout, headers=headers or None)
+    if previous is None:
+        return response, False
+    if response.status_code == 304:
+        return response, True
+    return response, previous.get("hash") == content_hash(response.text)
+
+
+def page_record(response, links, unchanged, previous=None):
+    """
+    State of a fetched page as stored in the page_state table (findings are added by the scanner).
+    """
+    previous = previous or {}
+    if response.status_code == 304:
+        return {
+            "etag": response.headers.get('ETag') or previous.get("etag"),
+            "last_modified": response.headers.get('Last-Modified') or previous.get("last_modified"),
+            "hash": previous.get("hash"),
+            "links": previous.get("links"),
+            "unchanged": True
+        }
+    return {
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+        "hash": content_hash(response.text),
+        "links": links,
+        "unchanged": unchanged
+    }
+
+
+class AsyncCrawler:
+    """
+    Concurrent breadth-first crawler.
+    A bounded pool of asyncio workers pulls URLs from a shared deque frontier.
+    The blocking session calls run on a private thread pool, and a per-host
+    semaphore keeps any single host from receiving too many parallel requests.
+    With `page_states` from a previous scan, pages are revalidated with
+    conditional requests and a 304 reuses the stored links; the state of every
+    fetched page ends up in `pages`.
+    Links are deduplicated on their canonical form, and at most
+    `per_cluster` URLs of one route template / parameter set are followed.
+    """
+
+    def __init__(self, session, max_workers=10, per_host_limit=4, max_depth=1, max_pages=500, timeout=5, should_stop=None, page_states=None, per_cluster=None):
+        self.session = session
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.should_stop = should_stop or (lambda: False)
+        self.page_states = page_states or {}
+        self.pages = {}
+        self.clusters = UrlClusters(per_cluster)
+
+    def crawl(self, start_url):
+        """
+        Crawls from start_url and returns a set of unique internal URLs.
+        URLs found at max_depth are included but not fetched.
+        """
+        return asyncio.run(self._crawl(start_url))
+
+    async def _crawl(self, start_url):
+        self._domain = urlparse(start_url).netloc
+        self._visited = {start_url}
+        self._seen = {canonicalize(start_url)}
+        self.clusters.admit(canonicalize(start_url))
+        self._frontier = deque()
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+        self._host_limits = {}
+
+        if self.max_depth > 0:
+            self._frontier.append((start_url, 0))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+            await asyncio.gather(*workers)
+
+        return set(self._visited)
+
+    async def _worker(self):
+        while True:
+            async with self._cond:
+                while not self._frontier and self._in_flight > 0:
+                    await self._cond.wait()
+                if self.should_stop():
+                    self._frontier.clear()
+                if not self._frontier:
+                    # Frontier drained and nothing in flight: wake the others so they exit too
+                    self._cond.notify_all()
+                    return
+                url, depth = self._frontier.popleft()
+                self._in_flight += 1
+
+            links = []
+            try:
+                links = await self._fetch_links(url)
+            except Exception:
+                pass
+            finally:
+                async with self._cond:
+                    self._in_flight -= 1
+                    for link in links:
+                        if link in self._seen or len(self._visited) >= self.max_pages:
+                            continue
+                        self._seen.add(link)
+                        if not self.clusters.admit(link):
+                            continue
+                        self._visited.add(link)
+                        if depth + 1 < self.max_depth:
+                            self._frontier.append((link, depth + 1))
+                    self._cond.notify_all()
+
+    def _host_limit(self, host):
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _fetch_links(self, url):
+        if not url.startswith(('http', 'https')):
+            return []
+
+        loop = asyncio.get_running_loop()
+        async with self._host_limit(urlparse(url).netloc):
+            return await loop.run_in_executor(self._executor, self._get_links, url)
+
+    def _get_links(self, url):
+        previous = self.page_states.get(url)
+        if previous and previous.get("links") is None:
+            # Stored without links (never crawled): a 304 would leave nothing to follow, so only compare hashes
+            previous = dict(previous, etag=None, last_modified=None)
+        with session_check(self.session, "Crawl"):
+            response, unchanged = conditional_get(self.session, url, previous, timeout=self.timeout)
+        if response.status_code == 304:
+            self.pages[url] = page_record(response, None, True, previous)
+            return list(previous["links"])
+
+        doc = get_document(url, response.text)
+
+        links = []
+        for full_url in doc.links:
+            parsed_link = urlparse(full_url)
+
+            # Only internal links, no static assets
+            if parsed_link.netloc == self._domain or parsed_link.netloc == '':
+                if not full_url.lower().endswith(STATIC_EXTENSIONS):
+                    links.append(canonicalize(full_url))
+        self.pages[url] = page_record(response, links, unchanged, self.page_states.get(url))
+        return links
@@ -1,19 +1,162 @@
 import sqlite3
 import datetime
+import json
+import os
+import queue
+import contextlib
+import threading
+import concurrent.futures
+import uuid
+import zlib
+from urllib.parse import urlparse
 
 DB_NAME = "webscanner.db"
 
+# Bumped whenever _create_schema gains a migration step (stored in PRAGMA user_version)
+SCHEMA_VERSION = 2
+
+# reports.data is stored as PAYLOAD_MAGIC + zlib(JSON). The marker carries the
+# format version; plain TEXT rows from older databases are still readable.
+PAYLOAD_MAGIC = b"UGZ1"
+PAYLOAD_LEVEL = 6
+
+# Finding keys that have their own column; anything else goes to findings.extra
+FINDING_COLUMNS = ("title", "severity", "desc", "path", "param", "occurrences")
+FINDING_GROUPS = ("severity", "title", "host")
+
+# In-process change counters for list endpoints (ETags). The instance token
+# changes on every start so stale ETags from a previous run never match.
+_instance_token = uuid.uuid4().hex[:8]
+_data_versions = {"reports": 0, "targets": 0}
+_versions_lock = threading.Lock()
+
+# Connection manager: a pool of persistent reader connections and a single
+# writer thread that owns all writes, so concurrent scan workers never race
+# each other into "database is locked". sqlite3 keeps a cache of prepared
+# statements per connection, so long-lived connections reuse them.
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_MS = 5000
+READ_POOL_SIZE = 4
+
+_read_pool = queue.LifoQueue()
+_generation = 0
+_writer_conn = None
+
+_write_queue = queue.Queue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+def _connect():
+    conn = sqlite3.connect(DB_NAME, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-8000")
+    return conn
+
+def _touch(*tables):
+    with _versions_lock:
+        for table in tables:
+            _data_versions[table] += 1
+
+def data_version(table):
+    """
+    Returns a token that changes whenever rows of `table` are written.
+    """
+    with _versions_lock:
+        return f"{_instance_token}.{_data_versions[table]}"
+
+def _pool_key():
+    return (DB_NAME, _generation)
+
+@contextlib.contextmanager
+def reader():
+    """
+    Borrows a pooled read connection (opening one if none is idle).
+    """
+    conn = None
+    while conn is None:
+        try:
+            conn, key = _read_pool.get_nowait()
+        except queue.Empty:
+            conn, key = _connect(), _pool_key()
+        if key != _pool_key():
+            # Opened before a reset or against another DB_NAME
+            conn.close()
+            conn = None
+    try:
+        yield conn
+    finally:
+        if key == _pool_key() and _read_pool.qsize() < READ_POOL_SIZE:
+            _read_pool.put((conn, key))
+        else:
+            conn.close()
+
+def close_connections():
+    global _generation
+    _generation += 1
+    while True:
+        try:
+            conn, _ = _read_pool.get_nowait()
+        except queue.Empty:
+            break
+        conn.close()
+
+def _writer_loop():
+    global _writer_conn
+    key = None
+    while True:
+        func, args, future = _write_queue.get()
+        if not future.set_running_or_notify_cancel():
+            continue
+        if func is None:
+            # Release request (reset_db): close the connection so the file can be removed
+            if _writer_conn is not None:
+                _writer_conn.close()
+            _writer_conn = None
+            future.set_result(None)
+            continue
+        try:
+            if _writer_conn is None or key != _pool_key():
+                if _writer_conn is not None:
+                    _writer_conn.close()
+                _writer_conn, key = _connect(), _pool_key()
+            with _writer_conn:
+                result = func(_writer_conn, *args)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+
+def _write(func, *args):
+    """
+    Runs func(conn, *args) in one transaction on the writer thread and returns its result.
+    """
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_writer_loop, name="db-writer", daemon=True)
+            _writer_thread.start()
+    future = concurrent.futures.Future()
+    _write_queue.put((func, args, future))
+    return future.result()
+
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
+    _write(_create_schema)
+
+def _create_schema(conn):
     c = conn.cursor()
-    
+
     # Create Targets Table
     c.execute('''CREATE TABLE IF NOT EXISTS targets (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     url TEXT UNIQUE NOT NULL,
                     added_at TEXT NOT NULL
                 )''')
-                
+
     # Create Reports Table
     c.execute('''CREATE TABLE IF NOT EXISTS reports (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -22,7 +165,7 @@ def init_db():
                     vuln_count INTEGER,
                     data TEXT
                 )''')
-    
+
     # Create Settings Table
     c.execute('''CREATE TABLE IF NOT EXISTS settings (
                     key TEXT PRIMARY KEY,
@@ -36,23 +179,142 @@ def init_db():
             "dark_mode": "true",
             "auto_report": "true",
             "proxy": "",
-            "scan_timeout": "10"
+            "scan_timeout": "10",
+            "archive_raw_reports": "true",
+            "port_range": "top",
+            "incremental_rescan": "true",
+            "probe_per_cluster": "3",
+            "max_requests": "20000",
+            "max_body_kb": "1024"
         }
         for k, v in default_settings.items():
             c.execute("INSERT INTO settings (key, value) VALUES (?, ?)", (k, v))
-    
-    conn.commit()
-    conn.close()
+
+    # Create Findings Table (one row per finding, the report blob is only a raw archive)
+    c.execute('''CREATE TABLE IF NOT EXISTS findings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+                    host TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    severity TEXT NOT NULL,
+                    path TEXT,
+                    description TEXT,
+                    param TEXT,
+                    occurrences INTEGER NOT NULL DEFAULT 1,
+                    extra TEXT
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_findings_report ON findings (report_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_findings_severity ON findings (severity, report_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_findings_title ON findings (title, report_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_findings_host ON findings (host, report_id)")
+
+    # Per-URL state of the last completed scan, used by incremental rescans
+    c.execute('''CREATE TABLE IF NOT EXISTS page_state (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    checks TEXT,
+                    links TEXT,
+                    findings TEXT,
+                    scanned_at TEXT NOT NULL
+                )''')
+
+    # List filters on /api/reports (pagination itself walks the id primary key)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reports_date ON reports (date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reports_vuln_count ON reports (vuln_count)")
+
+    version = c.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        # Split the findings out of the JSON blobs of existing reports
+        for row in c.execute("SELECT id, url, data FROM reports").fetchall():
+            try:
+                vulns = json.loads(unpack_payload(row["data"])).get("vulnerabilities", [])
+            except Exception:
+                continue
+            _insert_findings(c, row["id"], row["url"], vulns)
+    if version < 2:
+        # Compress report payloads stored as plain JSON text
+        rows = c.execute("SELECT id, data FROM reports WHERE typeof(data) = 'text'").fetchall()
+        c.executemany("UPDATE reports SET data = ? WHERE id = ?", [(pack_payload(row["data"]), row["id"]) for row in rows])
+    if version < SCHEMA_VERSION:
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def pack_payload(data_json):
+    if data_json is None:
+        return None
+    return PAYLOAD_MAGIC + zlib.compress(data_json.encode('utf-8'), PAYLOAD_LEVEL)
+
+def unpack_payload(value):
+    """
+    Returns the JSON text of a stored report payload (compressed or legacy plain text).
+    """
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(PAYLOAD_MAGIC):
+        return zlib.decompress(value[len(PAYLOAD_MAGIC):]).decode('utf-8')
+    return value.decode('utf-8')
+
+def _finding_host(url):
+    return (urlparse(url).netloc or url or "").lower()
+
+def _insert_findings(c, report_id, url, vulns):
+    host = _finding_host(url)
+    rows = []
+    for v in vulns:
+        if not isinstance(v, dict):
+            continue
+        extra = {k: val for k, val in v.items() if k not in FINDING_COLUMNS}
+        rows.append((
+            report_id, host,
+            str(v.get("title", "")),
+            str(v.get("severity") or "info"),
+            v.get("path"),
+            v.get("desc"),
+            v.get("param"),
+            int(v.get("occurrences") or 1),
+            json.dumps(extra) if extra else None
+        ))
+    c.executemany('''INSERT INTO findings (report_id, host, title, severity, path, description, param, occurrences, extra)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+
+def _finding_from_row(row):
+    finding = {
+        "title": row["title"],
+        "severity": row["severity"],
+        "desc": row["description"],
+        "path": row["path"]
+    }
+    if row["param"]:
+        finding["param"] = row["param"]
+    if row["occurrences"] != 1:
+        finding["occurrences"] = row["occurrences"]
+    if row["extra"]:
+        finding.update(json.loads(row["extra"]))
+    return finding
+
+def reset_db():
+    """
+    Deletes the database file (and its WAL files) and recreates an empty schema.
+    """
+    _write(None)
+    close_connections()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_NAME + suffix):
+            os.remove(DB_NAME + suffix)
+    init_db()
+    _touch("reports", "targets")
 
 def add_target(url):
+    def insert(conn, url, added_at):
+        c = conn.execute("INSERT INTO targets (url, added_at) VALUES (?, ?)", (url, added_at))
+        return c.lastrowid
+
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         added_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        c.execute("INSERT INTO targets (url, added_at) VALUES (?, ?)", (url, added_at))
-        conn.commit()
-        last_id = c.lastrowid
-        conn.close()
+        last_id = _write(insert, url, added_at)
+        _touch("targets")
         return {"id": last_id, "url": url, "addedAt": added_at}
     except sqlite3.IntegrityError:
         return None  # Duplicate
@@ -60,84 +322,237 @@ def add_target(url):
         print(e)
         return None
 
-def get_targets():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM targets ORDER BY id DESC")
-    rows = c.fetchall()
-    targets = [{"id": row["id"], "url": row["url"], "addedAt": row["added_at"]} for row in rows]
-    conn.close()
-    return targets
+def _like(text):
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+def get_targets(limit=None, before_id=None, url=None):
+    """
+    Lists targets newest first. With `limit`, pages by keyset: pass the id of
+    the last row seen as `before_id` to get the next page.
+    """
+    clauses = []
+    params = []
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if url:
+        clauses.append("url LIKE ? ESCAPE '\\'")
+        params.append(_like(url))
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    sql = f"SELECT * FROM targets {where} ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with reader() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{"id": row["id"], "url": row["url"], "addedAt": row["added_at"]} for row in rows]
 
 def delete_target(target_id):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("DELETE FROM targets WHERE id = ?", (target_id,))
-    conn.commit()
-    conn.close()
+    _write(lambda conn: conn.execute("DELETE FROM targets WHERE id = ?", (target_id,)))
+    _touch("targets")
 
 def clean_targets():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("DELETE FROM targets")
-    conn.commit()
-    conn.close()
+    _write(lambda conn: conn.execute("DELETE FROM targets"))
+    _touch("targets")
+
+def add_report(url, vuln_count, data_json=None, findings=None):
+    """
+    Stores a report and bulk-inserts its findings in the same transaction.
+    data_json is the optional raw archive of the whole scan result; when
+    findings is not given they are taken from data_json["vulnerabilities"].
+    """
+    if findings is None and data_json:
+        try:
+            findings = json.loads(data_json).get("vulnerabilities", [])
+        except Exception:
+            findings = []
+
+    def insert(conn, url, date_str, vuln_count, data_json, findings):
+        c = conn.execute("INSERT INTO reports (url, date, vuln_count, data) VALUES (?, ?, ?, ?)",
+                         (url, date_str, vuln_count, pack_payload(data_json)))
+        report_id = c.lastrowid
+        _insert_findings(c, report_id, url, findings or [])
+        return report_id
 
-def add_report(url, vuln_count, data_json):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
     date_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("INSERT INTO reports (url, date, vuln_count, data) VALUES (?, ?, ?, ?)", 
-              (url, date_str, vuln_count, data_json))
-    conn.commit()
-    last_id = c.lastrowid
-    conn.close()
+    last_id = _write(insert, url, date_str, vuln_count, data_json, findings)
+    _touch("reports")
     return {"id": last_id, "url": url, "date": date_str, "vulnCheck": vuln_count}
 
-def get_reports():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT id, url, date, vuln_count FROM reports ORDER BY id DESC")
-    rows = c.fetchall()
-    reports = [{"id": row["id"], "url": row["url"], "date": row["date"], "vulnCheck": row["vuln_count"]} for row in rows]
-    conn.close()
-    return reports
+def get_reports(limit=None, before_id=None, url=None, date_from=None, date_to=None, min_vulns=None):
+    """
+    Lists reports newest first, filtered by URL substring, date range and
+    minimum vuln count. With `limit`, pages by keyset on the id (`before_id`).
+    """
+    clauses = []
+    params = []
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if url:
+        clauses.append("url LIKE ? ESCAPE '\\'")
+        params.append(_like(url))
+    if date_from:
+        clauses.append("date >= ?")
+        params.append(date_from)
+    if date_to:
+        # A bare YYYY-MM-DD includes the whole day
+        clauses.append("date <= ?")
+        params.append(date_to + " 23:59:59" if len(date_to) == 10 else date_to)
+    if min_vulns is not None:
+        clauses.append("vuln_count >= ?")
+        params.append(min_vulns)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    sql = f"SELECT id, url, date, vuln_count FROM reports {where} ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    with reader() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{"id": row["id"], "url": row["url"], "date": row["date"], "vulnCheck": row["vuln_count"]} for row in rows]
 
 def get_report_detail(report_id):
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
-    row = c.fetchone()
-    conn.close()
+    with reader() as conn:
+        row = conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        if row and row["data"] is None:
+            # No raw archive: rebuild the result from the findings table
+            finding_rows = conn.execute("SELECT * FROM findings WHERE report_id = ? ORDER BY id", (report_id,)).fetchall()
     if row:
+        # Payloads are only decompressed here, list queries never select them
+        data = unpack_payload(row["data"])  # JSON string
+        if data is None:
+            data = json.dumps({
+                "url": row["url"],
+                "logs": [],
+                "vulnerabilities": [_finding_from_row(f) for f in finding_rows]
+            })
         return {
             "id": row["id"],
             "url": row["url"],
             "date": row["date"],
             "vulnCheck": row["vuln_count"],
-            "data": row["data"]  # This should be JSON string
+            "data": data
         }
     return None
 
+def _findings_filter(severity=None, title=None, host=None, report_id=None, last_reports=None):
+    clauses = []
+    params = []
+    if severity:
+        severities = [s.strip().lower() for s in severity.split(',') if s.strip()]
+        clauses.append(f"f.severity IN ({', '.join('?' for _ in severities)})")
+        params.extend(severities)
+    if title:
+        clauses.append("f.title = ?")
+        params.append(title)
+    if host:
+        clauses.append("f.host = ?")
+        params.append(host.lower())
+    if report_id is not None:
+        clauses.append("f.report_id = ?")
+        params.append(report_id)
+    if last_reports:
+        # Only the N most recent reports
+        clauses.append("f.report_id >= (SELECT min(id) FROM (SELECT id FROM reports ORDER BY id DESC LIMIT ?))")
+        params.append(int(last_reports))
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+def query_findings(severity=None, title=None, host=None, report_id=None, last_reports=None, limit=100, offset=0):
+    """
+    Lists findings across reports, newest first, filtered in SQL.
+    """
+    where, params = _findings_filter(severity, title, host, report_id, last_reports)
+    with reader() as conn:
+        rows = conn.execute(f'''SELECT f.*, r.url AS report_url, r.date AS report_date
+                                FROM findings f JOIN reports r ON r.id = f.report_id
+                                {where}
+                                ORDER BY f.report_id DESC, f.id
+                                LIMIT ? OFFSET ?''', params + [int(limit), int(offset)]).fetchall()
+    results = []
+    for row in rows:
+        finding = _finding_from_row(row)
+        finding.update({
+            "id": row["id"],
+            "reportId": row["report_id"],
+            "host": row["host"],
+            "url": row["report_url"],
+            "date": row["report_date"]
+        })
+        results.append(finding)
+    return results
+
+def aggregate_findings(group_by="severity", severity=None, title=None, host=None, last_reports=None):
+    """
+    Counts findings grouped by severity, title or host.
+    """
+    if group_by not in FINDING_GROUPS:
+        raise ValueError(f"group_by must be one of {', '.join(FINDING_GROUPS)}")
+    where, params = _findings_filter(severity, title, host, None, last_reports)
+    with reader() as conn:
+        rows = conn.execute(f'''SELECT f.{group_by} AS name, count(*) AS findings,
+                                       sum(f.occurrences) AS occurrences, count(DISTINCT f.report_id) AS reports
+                                FROM findings f
+                                {where}
+                                GROUP BY f.{group_by}
+                                ORDER BY findings DESC''', params).fetchall()
+    return [{group_by: row["name"], "findings": row["findings"], "occurrences": row["occurrences"], "reports": row["reports"]}
+            for row in rows]
+
 def get_settings():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM settings")
-    rows = c.fetchall()
-    conn.close()
+    with reader() as conn:
+        rows = conn.execute("SELECT * FROM settings").fetchall()
     settings = {row['key']: row['value'] for row in rows}
     return settings
 
+def get_page_states(origin):
+    """
+    Returns {url: state} for every stored page under origin (scheme://host[:port]).
+    """
+    prefix = origin.rstrip('/') + '/'
+    with reader() as conn:
+        rows = conn.execute("SELECT * FROM page_state WHERE url = ? OR substr(url, 1, ?) = ?",
+                            (origin, len(prefix), prefix)).fetchall()
+    states = {}
+    for row in rows:
+        states[row["url"]] = {
+            "etag": row["etag"],
+            "last_modified": row["last_modified"],
+            "hash": row["content_hash"],
+            "checks": row["checks"],
+            "links": json.loads(row["links"]) if row["links"] is not None else None,
+            "findings": json.loads(row["findings"]) if row["findings"] is not None else None,
+            "scannedAt": row["scanned_at"]
+        }
+    return states
+
+def save_page_states(states):
+    """
+    Stores the state of each scanned page ({url: state} as returned by get_page_states).
+    """
+    def upsert(conn, rows):
+        conn.executemany('''REPLACE INTO page_state (url, etag, last_modified, content_hash, checks, links, findings, scanned_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+
+    scanned_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = [(
+        url,
+        state.get("etag"),
+        state.get("last_modified"),
+        state.get("hash"),
+        state.get("checks"),
+        json.dumps(state["links"]) if state.get("links") is not None else None,
+        json.dumps(state["findings"]) if state.get("findings") is not None else None,
+        scanned_at
+    ) for url, state in states.items()]
+    if rows:
+        _write(upsert, rows)
+
 def update_setting(key, value):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
-    conn.commit()
-    conn.close()
+    _write(lambda conn: conn.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value))))
     return {key: value}
 
 # Initialize on import
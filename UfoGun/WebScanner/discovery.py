@@ -0,0 +1,120 @@
+import os
+import threading
+import concurrent.futures
+from metrics import session_check
+from soft404 import Soft404Detector
+from subdomains import WORDLIST_DIR
+
+SENSITIVE_WORDLIST = os.path.join(WORDLIST_DIR, 'sensitive_files.txt')
+ADMIN_WORDLIST = os.path.join(WORDLIST_DIR, 'admin_paths.txt')
+
+# Candidates are classified on the start of their body only (see soft404.py)
+DISCOVERY_PEEK = 64 * 1024
+
+DEFAULT_SEVERITY = "medium"
+
+
+def iter_paths(path, extensions=()):
+    """
+    Streams (path, severity) entries from a wordlist file, one per line:
+    a path relative to the site root, optionally followed by a severity.
+    Blank lines and '#' comments are skipped and the file is never loaded
+    whole. With `extensions` ("php", "bak"...), names without an extension
+    are also tried with each of them.
+    """
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split()
+            word = fields[0].lstrip('/')
+            severity = fields[1].lower() if len(fields) > 1 else DEFAULT_SEVERITY
+            if not word:
+                continue
+            yield word, severity
+            name = word.rsplit('/', 1)[-1]
+            if extensions and name and '.' not in name.lstrip('.'):
+                for ext in extensions:
+                    yield f"{word}.{ext.lstrip('.')}", severity
+
+
+class DiscoveryHit:
+    def __init__(self, path, url, severity, response):
+        self.path = path
+        self.url = url
+        self.severity = severity
+        self.response = response
+
+    @property
+    def status(self):
+        return self.response.status_code
+
+
+class ContentDiscovery:
+    """
+    Wordlist-driven path discovery on the scan's pooled session.
+    Paths are pulled lazily from the wordlist generator, so only a bounded
+    window of requests is in flight however large the list is, and each URL
+    is requested at most once per scan even when several lists contain it.
+    Each candidate gets one capped GET and is classified against the host's
+    soft-404 baseline.
+    """
+
+    def __init__(self, session, soft404=None, max_workers=10, timeout=3, should_stop=None):
+        self.session = session
+        self.soft404 = soft404 or Soft404Detector(session)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.should_stop = should_stop or (lambda: False)
+        self.requested = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def _claim(self, url):
+        with self._lock:
+            if url in self._seen:
+                return False
+            self._seen.add(url)
+            self.requested += 1
+            return True
+
+    def _check(self, url, allow_redirects, label):
+        with session_check(self.session, label):
+            res = self.session.get(url, timeout=self.timeout, allow_redirects=allow_redirects, max_bytes=DISCOVERY_PEEK)
+            if self.soft404.exists(url, res, allow_redirects):
+                return res
+        return None
+
+    def run(self, base_url, entries, statuses=(200,), allow_redirects=False, label="Content Discovery"):
+        """
+        Checks every (path, severity) of `entries` under base_url and yields a
+        DiscoveryHit, as the checks complete, for each path that exists with
+        one of `statuses`.
+        """
+        root = base_url.rstrip('/') + '/'
+        entries = iter(entries)
+        window = self.max_workers * 2
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            while True:
+                while len(pending) < window and not self.should_stop():
+                    entry = next(entries, None)
+                    if entry is None:
+                        break
+                    path, severity = entry
+                    url = root + path
+                    if self._claim(url):
+                        pending[executor.submit(self._check, url, allow_redirects, label)] = (path, url, severity)
+                if not pending:
+                    break
+
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    path, url, severity = pending.pop(future)
+                    try:
+                        res = future.result()
+                    except Exception:
+                        continue
+                    if res is not None and res.status_code in statuses:
+                        yield DiscoveryHit(path, url, severity, res)
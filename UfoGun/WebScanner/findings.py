@@ -0,0 +1,68 @@
+import threading
+from urllib.parse import urlparse, parse_qsl
+
+MAX_EXAMPLES = 5
+
+
+def normalize_path(path):
+    """
+    Reduces a finding path to its route: lowercased host, path without
+    trailing slash and the sorted parameter names (values dropped).
+    Non-URL paths ("DNS Enumeration", "Header: Server") are returned as-is.
+    """
+    if not path or not path.startswith(('http://', 'https://')):
+        return path or ''
+    parsed = urlparse(path)
+    names = sorted(set(k for k, _ in parse_qsl(parsed.query, keep_blank_values=True)))
+    route = f"{parsed.netloc.lower()}{parsed.path.rstrip('/') or '/'}"
+    if names:
+        route += '?' + '&'.join(names)
+    return route
+
+
+def fingerprint(title, path, param=None):
+    return (title, param or '', normalize_path(path))
+
+
+class FindingsCollector:
+    """
+    Thread-safe findings store indexed by fingerprint (check, parameter, normalized path).
+    Duplicates are merged into an occurrence count and a capped list of example URLs.
+    """
+
+    def __init__(self, max_examples=MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self._findings = {}
+        self._order = []
+        self._lock = threading.Lock()
+
+    def add(self, finding, param=None):
+        """
+        Records a finding. Returns (stored finding, True if it was new).
+        """
+        key = fingerprint(finding["title"], finding.get("path"), param)
+        with self._lock:
+            existing = self._findings.get(key)
+            if existing is not None:
+                existing["occurrences"] += 1
+                path = finding.get("path")
+                if path and path not in existing["examples"] and len(existing["examples"]) < self.max_examples:
+                    existing["examples"].append(path)
+                return existing, False
+
+            stored = dict(finding)
+            if param:
+                stored["param"] = param
+            stored["occurrences"] = 1
+            stored["examples"] = [finding["path"]] if finding.get("path") else []
+            self._findings[key] = stored
+            self._order.append(key)
+            return stored, True
+
+    def as_list(self):
+        with self._lock:
+            return [self._findings[key] for key in self._order]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._order)
@@ -0,0 +1,250 @@
+import time
+import codecs
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Connection': 'keep-alive'
+}
+
+# Connection-level retries only; a read timeout on a probe is not worth repeating
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.2
+DEFAULT_POOL_SIZE = 10
+
+# Bodies are streamed and read up to this many bytes (1 MB); error pages and dumps can be far larger
+DEFAULT_MAX_BODY = 1024 * 1024
+BODY_CHUNK_SIZE = 16 * 1024
+
+# Revalidation headers are left out of cache keys: a cached 200 answers a conditional GET too
+CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+class ResponseCache:
+    """
+    Per-scan response cache keyed by method, URL and body.
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the entry or byte limit is reached.
+    """
+
+    def __init__(self, ttl=300, max_entries=1024, max_bytes=32 * 1024 * 1024, methods=('GET', 'HEAD')):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.methods = set(m.upper() for m in methods)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, response)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, method, url, params=None, data=None, json=None, headers=None, allow_redirects=True):
+        prepared = requests.Request(method.upper(), url, params=params, data=data, json=json).prepare()
+        extra = tuple(sorted(headers.items())) if headers else ()
+        return (prepared.method, prepared.url, prepared.body, allow_redirects, extra)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, response):
+        size = len(response.content or b'')
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, response)
+            self._size += size
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+def read_body(response, max_bytes=DEFAULT_MAX_BODY, stop=None, chunk_size=BODY_CHUNK_SIZE):
+    """
+    Reads a response opened with stream=True, keeping at most `max_bytes` of
+    the body (None reads everything). `stop` is called with each decoded text
+    chunk and ends the read as soon as it returns True, e.g. once a signature
+    was seen (see signatures.ChunkMatcher). The bytes read become
+    response.content / response.text as usual; response.truncated tells
+    whether the rest of the body was left unread, in which case the
+    connection is closed instead of being returned to the pool.
+    """
+    decoder = None
+    if stop is not None:
+        try:
+            decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    body = bytearray()
+    truncated = False
+    if max_bytes == 0:
+        # Status and headers only
+        truncated = (response.request.method != 'HEAD' and response.status_code not in (204, 304)
+                     and response.headers.get('Content-Length') != '0')
+    else:
+        for chunk in response.iter_content(chunk_size):
+            if max_bytes is not None and len(body) + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - len(body)]
+                truncated = True
+            body += chunk
+            if decoder is not None and chunk and stop(decoder.decode(chunk)):
+                truncated = True
+            if truncated:
+                break
+
+    response._content = bytes(body)
+    response._content_consumed = True
+    response.truncated = truncated
+    if truncated:
+        response.raw.close()
+    response.close()
+    return response
+
+
+class CachedSession(requests.Session):
+    """
+    requests.Session that answers repeated requests from a ResponseCache.
+    Bodies are streamed and read up to `max_body` bytes (read_body); a request
+    can lower that with `max_bytes` and stop reading early with `stop`.
+    Bodies cut short that way are never cached, and neither are streamed
+    requests, file uploads or 304 answers to conditional requests.
+    With a rate limiter, every request that does go to the network waits for
+    its host's token and reports its latency / status back; cache hits are free.
+    Network requests are also counted in the optional ScanMetrics and taken
+    from the optional ScanBudget (which raises BudgetExceeded once it is used up).
+    """
+
+    def __init__(self, cache=None, limiter=None, metrics=None, budget=None, max_body=DEFAULT_MAX_BODY):
+        super().__init__()
+        self.cache = cache
+        self.limiter = limiter
+        self.metrics = metrics
+        self.budget = budget
+        self.max_body = max_body
+
+    def _send(self, method, url, max_bytes=None, stop=None, **kwargs):
+        limiter = self.limiter
+        metrics = self.metrics
+        if self.budget is not None:
+            self.budget.consume()
+            if 'timeout' in kwargs:
+                kwargs['timeout'] = self.budget.clamp_timeout(kwargs['timeout'])
+        if limiter is not None:
+            limiter.acquire(url)
+        # Callers asking for stream=True read the body themselves
+        streamed = kwargs.get('stream', False)
+        kwargs['stream'] = True
+        try:
+            response = super().request(method, url, **kwargs)
+            if not streamed:
+                limit = self.max_body
+                if max_bytes is not None:
+                    limit = max_bytes if limit is None else min(limit, max_bytes)
+                read_body(response, limit, stop)
+        except requests.exceptions.RequestException as e:
+            if metrics is not None:
+                metrics.record_request(error=e)
+            if limiter is not None and isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                limiter.feedback(url, error=True)
+            raise
+        if metrics is not None:
+            metrics.record_request(response, stream=streamed)
+        if limiter is not None:
+            limiter.observe_response(url, response)
+        return response
+
+    def request(self, method, url, max_bytes=None, stop=None, **kwargs):
+        cache = self.cache
+        if cache is None or method.upper() not in cache.methods or kwargs.get('stream') or kwargs.get('files'):
+            return self._send(method, url, max_bytes, stop, **kwargs)
+
+        headers = kwargs.get('headers')
+        if headers:
+            headers = {k: v for k, v in headers.items() if k.lower() not in CONDITIONAL_HEADERS}
+        try:
+            key = cache.make_key(
+                method, url,
+                params=kwargs.get('params'),
+                data=kwargs.get('data'),
+                json=kwargs.get('json'),
+                headers=headers,
+                allow_redirects=kwargs.get('allow_redirects', True)
+            )
+        except Exception:
+            return self._send(method, url, max_bytes, stop, **kwargs)
+
+        response = cache.get(key)
+        if response is None:
+            response = self._send(method, url, max_bytes, stop, **kwargs)
+            # A body cut at the session's own limit is what every request gets; a shorter one is not
+            cut_short = response.truncated and (max_bytes is not None or stop is not None)
+            if response.status_code != 304 and not cut_short:
+                cache.put(key, response)
+        return response
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, cache=None, limiter=None, metrics=None, budget=None,
+                   max_body=DEFAULT_MAX_BODY):
+    """
+    Builds a keep-alive session whose connection pools hold `pool_size`
+    connections per host, so every worker thread can reuse a warm connection.
+    """
+    session = CachedSession(cache, limiter, metrics, budget, max_body)
+    session.headers.update(DEFAULT_HEADERS)
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        backoff_factor=backoff,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=max(1, pool_size), max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def shared_session():
+    """
+    Process-wide pooled session (without a response cache) for callers that are not part of a scan.
+    """
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
@@ -0,0 +1,356 @@
+import json
+import time
+import uuid
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from urllib.parse import urlparse
+import database
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ScanJob:
+    """
+    A single scan submitted to the JobManager.
+    The scan writes its logs and findings through this object so readers
+    (status polling) always see a consistent copy of the partial results.
+    Every log line, finding and status change is also recorded as a numbered
+    event that the SSE endpoint streams to clients as it happens.
+    """
+
+    def __init__(self, url):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.status = "queued"
+        self.error = None
+        self.report_id = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.results = {
+            "url": url,
+            "logs": [],
+            "vulnerabilities": []
+        }
+        self.events = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    @property
+    def finished(self):
+        return self.status not in ("queued", "running")
+
+    def _emit(self, event_type, data):
+        # Caller holds self._lock
+        self.events.append((len(self.events) + 1, event_type, data))
+        self._changed.notify_all()
+
+    def log(self, message):
+        with self._lock:
+            self.results["logs"].append(message)
+            self._emit("log", message)
+
+    def add_finding(self, finding):
+        with self._lock:
+            self.results["vulnerabilities"].append(finding)
+            self._emit("finding", finding)
+
+    def set_status(self, status):
+        with self._lock:
+            self.status = status
+            if status != "running" and status != "queued":
+                self.finished_at = time.time()
+            self._emit("status", {"status": status, "reportId": self.report_id, "error": self.error})
+
+    def wait_events(self, after_id, timeout=15):
+        """
+        Returns the events newer than after_id, blocking up to `timeout` seconds until there is one.
+        """
+        with self._lock:
+            if len(self.events) <= after_id and not self.finished:
+                self._changed.wait(timeout)
+            return self.events[after_id:]
+
+    def add_findings(self, findings):
+        for finding in findings:
+            self.add_finding(finding)
+
+    def set_result(self, key, value):
+        with self._lock:
+            self.results[key] = value
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def snapshot(self):
+        with self._lock:
+            results = dict(self.results)
+            results["logs"] = list(results["logs"])
+            results["vulnerabilities"] = list(results["vulnerabilities"])
+            return results
+
+    def to_dict(self, include_results=True):
+        data = {
+            "id": self.id,
+            "url": self.url,
+            "status": self.status,
+            "error": self.error,
+            "reportId": self.report_id,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+        if include_results:
+            data["results"] = self.snapshot()
+        else:
+            with self._lock:
+                data["vulnCount"] = len(self.results["vulnerabilities"])
+        return data
+
+
+class JobManager:
+    """
+    Runs scans on a bounded worker pool.
+    At most `max_workers` scans run at once and at most `max_pending` may wait
+    in the queue; finished scans are stored through database.add_report.
+    """
+
+    def __init__(self, runner, max_workers=2, max_pending=20, max_history=200):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, url):
+        job = ScanJob(url)
+        with self._lock:
+            # Tracked batch jobs (no future) wait in the BatchManager's own queue
+            pending = sum(1 for j in self.jobs.values() if j.status == "queued" and j.future is not None)
+            if pending >= self.max_pending:
+                raise QueueFull()
+            self.jobs[job.id] = job
+            self._trim()
+            job.future = self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def track(self, job):
+        """
+        Registers a job started elsewhere (e.g. by a batch) so it can be looked up, streamed and cancelled.
+        """
+        with self._lock:
+            self.jobs[job.id] = job
+            self._trim()
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == "queued" and job.future is not None and job.future.cancel():
+            job.set_status("cancelled")
+        return job
+
+    def _trim(self):
+        # Forget the oldest finished jobs once the history is full
+        finished = [j.id for j in self.jobs.values() if j.status not in ("queued", "running")]
+        while len(self.jobs) > self.max_history and finished:
+            del self.jobs[finished.pop(0)]
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            job.set_status("cancelled")
+            return
+
+        job.started_at = time.time()
+        job.set_status("running")
+        try:
+            self.runner(job)
+            job.check_cancelled()
+            results = job.snapshot()
+            # Findings always go to their own table; the full JSON is only kept as a raw archive
+            archive = database.get_settings().get("archive_raw_reports", "true") == "true"
+            report = database.add_report(
+                job.url,
+                len(results["vulnerabilities"]),
+                json.dumps(results) if archive else None,
+                findings=results["vulnerabilities"]
+            )
+            job.report_id = report["id"]
+            job.set_status("done")
+        except JobCancelled:
+            job.log("SCAN CANCELLED.")
+            job.set_status("cancelled")
+        except Exception as e:
+            job.error = str(e)
+            job.log(f"HATA: {str(e)}")
+            job.set_status("failed")
+
+
+class BatchJob:
+    """
+    A group of scans submitted together (e.g. the nightly sweep over all targets).
+    Each target is an ordinary ScanJob that writes its own report when it finishes;
+    the batch only aggregates their progress.
+    """
+
+    def __init__(self, urls):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.cancel_event = threading.Event()
+        self.jobs = [ScanJob(url) for url in urls]
+
+    @property
+    def finished(self):
+        return all(job.finished for job in self.jobs)
+
+    @property
+    def status(self):
+        if self.finished:
+            return "cancelled" if self.cancel_event.is_set() else "done"
+        if any(job.status != "queued" for job in self.jobs):
+            return "running"
+        return "queued"
+
+    def progress(self):
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        total = len(self.jobs)
+        completed = total - counts["queued"] - counts["running"]
+        counts["total"] = total
+        counts["percent"] = round(100.0 * completed / total, 1) if total else 100.0
+        return counts
+
+    def to_dict(self, include_jobs=True):
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "finishedAt": max(job.finished_at or 0 for job in self.jobs) if self.jobs and self.finished else None,
+            "progress": self.progress(),
+            "vulnCount": sum(len(job.results["vulnerabilities"]) for job in self.jobs),
+            "reportIds": [job.report_id for job in self.jobs if job.report_id is not None]
+        }
+        if include_jobs:
+            data["jobs"] = [job.to_dict(include_results=False) for job in self.jobs]
+        return data
+
+
+class BatchManager:
+    """
+    Schedules batch scans on a pool shared by all batches.
+    At most `max_workers` batch scans run at once and at most `per_host` of
+    them against the same host; a queued target whose host is busy is skipped
+    over, so one large site cannot hold up the rest of the sweep. Scans are
+    executed (and their reports saved) by the JobManager's runner and are
+    registered with it so /api/scan/<id> and its event stream work for them.
+    """
+
+    def __init__(self, job_manager, max_workers=4, per_host=1, max_history=50):
+        self.job_manager = job_manager
+        self.max_workers = max_workers
+        self.per_host = max(1, per_host)
+        self.max_history = max_history
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.batches = OrderedDict()
+        self.pending = []  # ScanJobs waiting for a worker, in submission order
+        self.running = 0
+        self.host_running = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url):
+        return (urlparse(url).hostname or url).lower()
+
+    def submit(self, urls):
+        # Keep the first occurrence of each URL
+        urls = list(OrderedDict.fromkeys(urls))
+        batch = BatchJob(urls)
+        for job in batch.jobs:
+            self.job_manager.track(job)
+        with self._lock:
+            self.batches[batch.id] = batch
+            self._trim()
+            self.pending.extend(batch.jobs)
+            self._dispatch()
+        return batch
+
+    def get(self, batch_id):
+        with self._lock:
+            return self.batches.get(batch_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.batches.values())
+
+    def cancel(self, batch_id):
+        batch = self.get(batch_id)
+        if batch is None:
+            return None
+        batch.cancel_event.set()
+        with self._lock:
+            ids = set(job.id for job in batch.jobs)
+            dropped = [job for job in self.pending if job.id in ids]
+            self.pending = [job for job in self.pending if job.id not in ids]
+        for job in batch.jobs:
+            job.cancel_event.set()
+        for job in dropped:
+            job.set_status("cancelled")
+        return batch
+
+    def _trim(self):
+        # Caller holds self._lock
+        finished = [b.id for b in self.batches.values() if b.finished]
+        while len(self.batches) > self.max_history and finished:
+            del self.batches[finished.pop(0)]
+
+    def _dispatch(self):
+        # Caller holds self._lock. Starts every pending job that fits the global and per-host limits.
+        index = 0
+        while index < len(self.pending) and self.running < self.max_workers:
+            job = self.pending[index]
+            if job.cancel_event.is_set():
+                # Cancelled through /api/scan/<id>/cancel while still queued
+                self.pending.pop(index)
+                job.set_status("cancelled")
+                continue
+            host = self.host_of(job.url)
+            if self.host_running.get(host, 0) >= self.per_host:
+                index += 1
+                continue
+            self.pending.pop(index)
+            self.running += 1
+            self.host_running[host] = self.host_running.get(host, 0) + 1
+            self.executor.submit(self._run, job, host)
+
+    def _run(self, job, host):
+        try:
+            self.job_manager._run(job)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.host_running[host] -= 1
+                if not self.host_running[host]:
+                    del self.host_running[host]
+                self._dispatch()
@@ -0,0 +1,223 @@
+import time
+import threading
+import contextlib
+import requests
+
+_local = threading.local()
+
+COUNTERS = ("requests", "bytes", "errors", "timeouts")
+
+# Scan duration histogram buckets (seconds) for the /metrics endpoint
+DURATION_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 1800)
+
+
+def _empty():
+    return dict.fromkeys(COUNTERS, 0)
+
+
+class ScanMetrics:
+    """
+    Structured timing for one scan, fed by CachedSession for every request
+    that goes to the network (cache hits are not counted).
+
+    Phases are consecutive sections of the scan (dns, port_scan, deep_scan...)
+    and spans are nested sections inside them; both record wall time and
+    the requests, bytes received, errors (connection failures, 5xx) and
+    timeouts seen while they were open. Checks are labelled per thread, so
+    requests made concurrently by the probe workers are still attributed to
+    the check that sent them; their time is the summed busy time.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.totals = _empty()
+        self.phases = []
+        self.spans = []
+        self.checks = {}
+        self._phase = None
+        self._lock = threading.Lock()
+
+    def record_request(self, response=None, error=None, stream=False):
+        label = getattr(_local, 'check', None)
+        delta = _empty()
+        delta["requests"] = 1
+        if error is not None:
+            if isinstance(error, requests.exceptions.Timeout):
+                delta["timeouts"] = 1
+            else:
+                delta["errors"] = 1
+        elif response is not None:
+            if stream:
+                delta["bytes"] = int(response.headers.get('Content-Length') or 0)
+            else:
+                delta["bytes"] = len(response.content or b'')
+            if response.status_code >= 500:
+                delta["errors"] = 1
+
+        with self._lock:
+            for key, value in delta.items():
+                self.totals[key] += value
+            if label and label[0] is self:
+                check = self.checks.setdefault(label[1], dict(_empty(), busy_s=0.0))
+                for key, value in delta.items():
+                    check[key] += value
+
+    def _snapshot(self):
+        with self._lock:
+            return dict(self.totals)
+
+    def _close(self, name, started, counters, target):
+        now = time.monotonic()
+        end = self._snapshot()
+        target.append(dict(
+            {key: end[key] - counters[key] for key in COUNTERS},
+            name=name,
+            start_s=round(started - self.started, 3),
+            wall_s=round(now - started, 3)
+        ))
+
+    def phase(self, name):
+        """
+        Ends the current phase (if any) and starts `name`.
+        """
+        if self._phase is not None:
+            self._close(*self._phase, self.phases)
+        self._phase = (name, time.monotonic(), self._snapshot()) if name else None
+
+    def finish(self):
+        self.phase(None)
+
+    @contextlib.contextmanager
+    def span(self, name):
+        started, counters = time.monotonic(), self._snapshot()
+        try:
+            yield
+        finally:
+            self._close(name, started, counters, self.spans)
+
+    @contextlib.contextmanager
+    def check(self, name):
+        """
+        Attributes the requests made by the current thread to check `name`.
+        """
+        previous = getattr(_local, 'check', None)
+        _local.check = (self, name)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            _local.check = previous
+            with self._lock:
+                check = self.checks.setdefault(name, dict(_empty(), busy_s=0.0))
+                check["busy_s"] += time.monotonic() - started
+
+    def to_dict(self):
+        with self._lock:
+            checks = {name: dict(values, busy_s=round(values["busy_s"], 3)) for name, values in self.checks.items()}
+            return {
+                "wall_s": round(time.monotonic() - self.started, 3),
+                "totals": dict(self.totals),
+                "phases": list(self.phases),
+                "spans": list(self.spans),
+                "checks": checks
+            }
+
+
+def session_span(session, name):
+    """
+    metrics.span(name) for a session that carries ScanMetrics, otherwise a no-op.
+    """
+    metrics = getattr(session, 'metrics', None)
+    return metrics.span(name) if metrics is not None else contextlib.nullcontext()
+
+
+def session_check(session, name):
+    metrics = getattr(session, 'metrics', None)
+    return metrics.check(name) if metrics is not None else contextlib.nullcontext()
+
+
+class MetricsRegistry:
+    """
+    Process-wide aggregate of finished scans, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.scans = 0
+        self.duration_sum = 0.0
+        self.duration_buckets = dict.fromkeys(DURATION_BUCKETS, 0)
+        self.totals = _empty()
+        self.phases = {}
+        self.checks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _add(table, name, values, time_key):
+        entry = table.setdefault(name, dict(_empty(), seconds=0.0, count=0))
+        for key in COUNTERS:
+            entry[key] += values.get(key, 0)
+        entry["seconds"] += values.get(time_key, 0.0)
+        entry["count"] += 1
+
+    def observe(self, scan):
+        """
+        Adds a finished scan (ScanMetrics.to_dict()).
+        """
+        with self._lock:
+            self.scans += 1
+            self.duration_sum += scan["wall_s"]
+            for bound in DURATION_BUCKETS:
+                if scan["wall_s"] <= bound:
+                    self.duration_buckets[bound] += 1
+            for key in COUNTERS:
+                self.totals[key] += scan["totals"].get(key, 0)
+            for phase in scan["phases"]:
+                self._add(self.phases, phase["name"], phase, "wall_s")
+            for name, values in scan["checks"].items():
+                self._add(self.checks, name, values, "busy_s")
+
+    def render(self, gauges=None):
+        """
+        Prometheus exposition text. `gauges` adds current values: {metric name: (help, {label value: value})}.
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        with self._lock:
+            lines.append("# HELP ufogun_scan_duration_seconds Wall time of finished scans.")
+            lines.append("# TYPE ufogun_scan_duration_seconds histogram")
+            for bound in DURATION_BUCKETS:
+                lines.append(f'ufogun_scan_duration_seconds_bucket{{le="{bound}"}} {self.duration_buckets[bound]}')
+            lines.append(f'ufogun_scan_duration_seconds_bucket{{le="+Inf"}} {self.scans}')
+            lines.append(f"ufogun_scan_duration_seconds_sum {round(self.duration_sum, 3)}")
+            lines.append(f"ufogun_scan_duration_seconds_count {self.scans}")
+
+            metric("ufogun_requests_total", "counter", "HTTP requests sent by scans.", [((), self.totals["requests"])])
+            metric("ufogun_response_bytes_total", "counter", "Response bytes received by scans.", [((), self.totals["bytes"])])
+            metric("ufogun_request_errors_total", "counter", "Connection failures and 5xx responses.", [((), self.totals["errors"])])
+            metric("ufogun_request_timeouts_total", "counter", "Requests that timed out.", [((), self.totals["timeouts"])])
+
+            for table, label, what in ((self.phases, "phase", "scan phase"), (self.checks, "check", "check")):
+                metric(f"ufogun_{label}_seconds_total", "counter", f"Time spent per {what}.",
+                       [(((label, name),), round(v["seconds"], 3)) for name, v in sorted(table.items())])
+                for key, help_text in (("requests", "Requests sent"), ("bytes", "Response bytes received"),
+                                       ("errors", "Errors"), ("timeouts", "Timeouts")):
+                    metric(f"ufogun_{label}_{key}_total", "counter", f"{help_text} per {what}.",
+                           [(((label, name),), v[key]) for name, v in sorted(table.items())])
+
+        for name, (help_text, values) in (gauges or {}).items():
+            metric(name, "gauge", help_text, [((("status", k),), v) for k, v in sorted(values.items())])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Shared by all scans of this process (served on /metrics)
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+# lxml is a lot faster than the pure-python parser; use it when it is installed
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class PageDocument:
+    """
+    Parsed view of a single HTML page.
+    The markup is parsed once and everything the checks need is extracted
+    up front, so neither the soup nor the body is kept around.
+    """
+
+    def __init__(self, url, html_content):
+        self.url = url
+
+        soup = BeautifulSoup(html_content, PARSER)
+
+        self.forms = []
+        for form in soup.find_all('form'):
+            self.forms.append({
+                "action": form.get('action', ''),
+                "method": form.get('method', 'get').upper(),
+                "inputs": [{"name": inp.get('name'), "type": inp.get('type')} for inp in form.find_all('input')]
+            })
+
+        base = url or ''
+        self.links = [urljoin(base, a['href']) for a in soup.find_all('a', href=True)]
+        self.script_srcs = [s.get('src') for s in soup.find_all('script', src=True) if s.get('src')]
+
+        self.meta_generator = None
+        meta_gen = soup.find('meta', attrs={'name': 'generator'})
+        if meta_gen and meta_gen.get('content'):
+            self.meta_generator = meta_gen.get('content')
+
+
+def get_document(url, html_content):
+    """
+    Returns the PageDocument for this URL and body, parsing it only on the first request.
+    """
+    key = (url, hash(html_content))
+    with _cache_lock:
+        doc = _cache.get(key)
+        if doc is not None:
+            _cache.move_to_end(key)
+            return doc
+
+    doc = PageDocument(url, html_content)
+
+    with _cache_lock:
+        _cache[key] = doc
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return doc
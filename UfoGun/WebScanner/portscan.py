@@ -0,0 +1,122 @@
+import time
+import socket
+import asyncio
+
+# The classic list scan_ports always covered
+TOP_PORTS = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 993, 995, 1433, 3306, 3389, 5432, 5900, 6379, 8080, 8443]
+
+
+def parse_ports(spec):
+    """
+    Parses a port spec such as "top", "1-1024", "22,80,8000-8100" or "1-65535" into a sorted list.
+    """
+    if not spec or spec.strip().lower() == 'top':
+        return list(TOP_PORTS)
+    ports = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            start, end = int(start), int(end)
+        else:
+            start = end = int(part)
+        if not (1 <= start <= end <= 65535):
+            raise ValueError(f"Invalid port range: {part}")
+        ports.update(range(start, end + 1))
+    return sorted(ports)
+
+
+class PortScanner:
+    """
+    Non-blocking TCP connect scanner on asyncio.
+    Up to `concurrency` connects are in flight at once. The connect timeout
+    follows the round-trip time measured to the host (smoothed like TCP's
+    SRTT/RTTVAR), so a nearby host is scanned with short timeouts and a
+    distant one still gets enough time to answer. Only completed handshakes
+    feed the estimate: a refusal comes back from the kernel at once even when
+    accepting is slow under hundreds of parallel connects. Ports that time out
+    are probed once more with max_timeout before they count as filtered.
+    """
+
+    def __init__(self, concurrency=500, min_timeout=0.25, max_timeout=3.0, initial_timeout=1.0):
+        self.concurrency = max(1, concurrency)
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.initial_timeout = initial_timeout
+        self.srtt = None
+        self.rttvar = None
+
+    @property
+    def timeout(self):
+        if self.srtt is None:
+            return self.initial_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+
+    def _observe_rtt(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def scan(self, host, ports, on_open=None, should_stop=None, rtt_port=None):
+        """
+        Scans `ports` on `host` and returns the sorted list of open ports.
+        on_open(port) is called as soon as each open port is found.
+        rtt_port (a port known to answer, e.g. the web port) seeds the RTT estimate before the scan starts.
+        """
+        return asyncio.run(self._scan(host, ports, on_open, should_stop or (lambda: False), rtt_port))
+
+    async def _probe(self, address, port, timeout=None):
+        """
+        Returns True (open), False (closed / refused) or None (filtered / timed out).
+        """
+        start = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout or self.timeout)
+        except ConnectionRefusedError:
+            return False
+        except (asyncio.TimeoutError, OSError):
+            return None
+        self._observe_rtt(time.monotonic() - start)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+        return True
+
+    async def _scan(self, host, ports, on_open, should_stop, rtt_port):
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        address = infos[0][4][0]
+
+        if rtt_port:
+            for _ in range(3):
+                await self._probe(address, rtt_port)
+
+        open_ports = []
+        timed_out = []
+
+        async def worker(port_iter, timeout=None, retry=None):
+            for port in port_iter:
+                if should_stop():
+                    return
+                state = await self._probe(address, port, timeout)
+                if state:
+                    open_ports.append(port)
+                    if on_open:
+                        on_open(port)
+                elif state is None and retry is not None:
+                    retry.append(port)
+
+        port_iter = iter(ports)
+        await asyncio.gather(*(worker(port_iter, retry=timed_out) for _ in range(self.concurrency)))
+
+        # A slow accept under load looks like a drop: second chance with the longest timeout
+        retry_iter = iter(timed_out)
+        await asyncio.gather(*(worker(retry_iter, self.max_timeout) for _ in range(min(self.concurrency, len(timed_out)))))
+        return sorted(open_ports)
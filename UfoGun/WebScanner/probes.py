@@ -0,0 +1,152 @@
+import threading
+import concurrent.futures
+import requests
+from urllib.parse import urlparse
+from metrics import session_check
+
+# Failures that say nothing about the target's behaviour; a probe that hit one was not tested
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+class ProbeCheck:
+    """
+    Declarative URL-parameter injection check.
+    `matcher(response, payload)` returns evidence (any truthy value) when the
+    payload worked, `describe(key, payload, evidence)` builds the finding text.
+    With scope 'param' a hit stops the remaining payloads for that parameter,
+    with scope 'url' it stops the check for every parameter of the URL.
+    `stop_on(payload)` may return a chunk callback (signatures.ChunkMatcher)
+    that ends the body read as soon as the evidence has arrived.
+    """
+
+    def __init__(self, title, severity, payloads, matcher, describe, scope='param',
+                 param_filter=None, needs_value=True, request_kwargs=None, stop_on=None):
+        self.title = title
+        self.severity = severity
+        self.payloads = payloads
+        self.matcher = matcher
+        self.describe = describe
+        self.scope = scope
+        self.param_filter = param_filter
+        self.needs_value = needs_value
+        self.request_kwargs = request_kwargs or {}
+        self.stop_on = stop_on
+
+    def applies_to(self, param):
+        if self.needs_value and '=' not in param:
+            return False
+        key = param.split('=')[0]
+        return self.param_filter is None or self.param_filter(key)
+
+
+class ProbeHit:
+    def __init__(self, check, key, payload, url, evidence):
+        self.check = check
+        self.key = key
+        self.payload = payload
+        self.url = url
+        self.evidence = evidence
+
+
+class ProbeEngine:
+    """
+    Runs every (URL, parameter, payload) combination of a set of checks on one
+    shared thread pool, so a page costs roughly the slowest probe instead of
+    the sum of all of them. Outstanding probes of a group are cancelled as
+    soon as the group has a confirmed hit.
+    """
+
+    def __init__(self, session, max_workers=20, timeout=3, should_stop=None):
+        self.session = session
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.should_stop = should_stop or (lambda: False)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def run(self, url, checks, errors=None):
+        """
+        Probes all query parameters of `url` with `checks`. Returns a list of ProbeHit.
+        Probes that failed with a TRANSIENT_ERRORS exception (timeout, connection
+        error...) are appended to `errors` as (check, param, exception), so a
+        caller can tell "clean" from "not tested".
+        """
+        parsed = urlparse(url)
+        if not parsed.query:
+            return []
+        params = [p for p in parsed.query.split('&') if p]
+
+        executor = self._get_executor()
+        stops = {}
+        future_groups = {}
+        for check in checks:
+            url_stop = threading.Event()
+            for param in params:
+                if not check.applies_to(param):
+                    continue
+                group = (check, param)
+                stops[group] = (threading.Event(), url_stop)
+                for payload in check.payloads:
+                    future = executor.submit(self._probe, parsed, check, param, payload, stops[group])
+                    future_groups[future] = group
+
+        hits = []
+        for future in concurrent.futures.as_completed(future_groups):
+            if future.cancelled():
+                continue
+            try:
+                hit = future.result()
+            except Exception as e:
+                if errors is not None and isinstance(e, TRANSIENT_ERRORS):
+                    errors.append(future_groups[future] + (e,))
+                continue
+            if hit is None:
+                continue
+
+            group = future_groups[future]
+            param_stop, url_stop = stops[group]
+            if param_stop.is_set() or url_stop.is_set():
+                continue
+            param_stop.set()
+            if hit.check.scope == 'url':
+                url_stop.set()
+            hits.append(hit)
+
+            # Drop the probes of this group that have not started yet
+            for other, other_group in future_groups.items():
+                if other_group == group or (hit.check.scope == 'url' and other_group[0] is hit.check):
+                    other.cancel()
+        return hits
+
+    def _probe(self, parsed, check, param, payload, stop_events):
+        param_stop, url_stop = stop_events
+        if param_stop.is_set() or url_stop.is_set() or self.should_stop():
+            return None
+
+        key = param.split('=')[0]
+        # Construct new URL with payload
+        test_query = parsed.query.replace(param, f"{key}={payload}")
+        test_url = parsed._replace(query=test_query).geturl()
+        kwargs = dict(check.request_kwargs)
+        if check.stop_on is not None:
+            kwargs['stop'] = check.stop_on(payload)
+        with session_check(self.session, check.title):
+            res = self.session.get(test_url, timeout=self.timeout, **kwargs)
+
+        evidence = check.matcher(res, payload)
+        if evidence:
+            return ProbeHit(check, key, payload, test_url, evidence)
+        return None
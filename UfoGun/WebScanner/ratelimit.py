@@ -0,0 +1,160 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Status codes that mean "slow down" rather than "no such page"
+CONGESTION_STATUSES = (429, 502, 503, 504)
+
+
+class HostBucket:
+    """
+    Token bucket for one host. `rate` is in requests per second and is moved
+    by AdaptiveRateLimiter; callers reserve a token and sleep until it is due.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.base_latency = None
+        self.slow_start = True
+        self.last_decrease = 0.0
+        self.requests = 0
+        self.decreases = 0
+        self.throttled = 0  # 429 responses
+        self.errors = 0
+
+    def reserve(self):
+        """
+        Takes one token and returns how long the caller must wait before sending.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        self.requests += 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host request rate limiter with AIMD congestion control.
+    Like TCP, a host starts in slow start (+1 request/s per good response, so
+    the rate roughly doubles every second) until the first sign of congestion.
+    After that every successful, timely response raises the rate so that it
+    grows by `increase` requests/s per second (additive increase). A 429/5xx burst,
+    a connection error or a response much slower than the host's baseline
+    latency multiplies the rate by `decrease` (multiplicative decrease), at
+    most once per `cooldown` seconds so that one burst of in-flight failures
+    only counts once. A Retry-After header pauses the host.
+    """
+
+    def __init__(self, initial_rate=50.0, min_rate=1.0, max_rate=500.0, increase=5.0, decrease=0.5,
+                 latency_factor=3.0, latency_slack=0.25, cooldown=1.0, burst=10, max_pause=30.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_slack = latency_slack
+        self.cooldown = cooldown
+        self.burst = burst
+        self.max_pause = max_pause
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url):
+        parsed = urlparse(url)
+        return (parsed.hostname or '').lower(), parsed.port
+
+    def _bucket(self, url):
+        # Caller holds self._lock
+        key = self.host_key(url)
+        bucket = self._hosts.get(key)
+        if bucket is None:
+            bucket = self._hosts[key] = HostBucket(self.initial_rate, self.burst)
+        return bucket
+
+    def acquire(self, url):
+        """
+        Blocks until a request to url's host may be sent.
+        """
+        with self._lock:
+            wait = self._bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def feedback(self, url, latency=None, status=None, error=False, retry_after=None):
+        """
+        Reports the outcome of a request: its latency and status code, or error=True for timeouts / connection failures.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(url)
+            congested = error or status in CONGESTION_STATUSES
+            if error:
+                bucket.errors += 1
+            if status == 429:
+                bucket.throttled += 1
+            if retry_after:
+                bucket.paused_until = max(bucket.paused_until, now + min(retry_after, self.max_pause))
+
+            if latency is not None and not congested:
+                base = bucket.base_latency
+                if base is not None and latency > max(base * self.latency_factor, base + self.latency_slack):
+                    congested = True
+                # Follows drops immediately and increases slowly, so a slowdown stays visible for a while
+                bucket.base_latency = latency if base is None else min(latency, base * 0.99 + latency * 0.01)
+
+            if congested:
+                if now - bucket.last_decrease >= self.cooldown:
+                    bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                    bucket.tokens = min(bucket.tokens, 1)
+                    bucket.last_decrease = now
+                    bucket.decreases += 1
+                    bucket.slow_start = False
+            elif bucket.slow_start:
+                bucket.rate = min(self.max_rate, bucket.rate + 1)
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase / bucket.rate)
+
+    def observe_response(self, url, response):
+        retry_after = None
+        if response.status_code in CONGESTION_STATUSES:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        self.feedback(url, latency=response.elapsed.total_seconds(), status=response.status_code, retry_after=retry_after)
+
+    def stats(self):
+        with self._lock:
+            return {
+                f"{host}:{port}" if port else host: {
+                    "rate": round(bucket.rate, 2),
+                    "requests": bucket.requests,
+                    "decreases": bucket.decreases,
+                    "throttled": bucket.throttled,
+                    "errors": bucket.errors
+                }
+                for (host, port), bucket in self._hosts.items()
+            }
+
+
+def parse_retry_after(value):
+    """
+    Returns the Retry-After delay in seconds (the header may hold seconds or an HTTP date).
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -153,52 +153,22 @@ startBtn.addEventListener('click', async () => {
     const radarInterval = setInterval(playRadarSound, 1500);
     const blipInterval = setInterval(spawnRadarBlip, 800);
 
-    // Simulation Sequence
     try {
         log(`Target acquired: ${url}`, 'cmd');
         spawnRadarBlip();
-        await wait(400);
 
-        log("Resolving host...", 'info');
-        await wait(600);
-
-        log("Host is UP. Initiating deep reconnaissance...", 'success');
-        await wait(500);
-
-        log("Starting comprehensive Port Scan (Top 20)...", 'info');
-        await wait(800);
-
-        log("Detected open ports: 80, 443, 8080...", 'success');
-        await wait(600);
-
-        // Admin Enumeration Simulation
-        log("[*] Starting Admin Page Enumeration...", 'cmd');
-        const commonPaths = ['/admin', '/login', '/wp-admin', '/dashboard', '/cpanel'];
-
-        for (const path of commonPaths) {
-            await wait(200);
-            if (Math.random() > 0.8) {
-                log(`[+] Potential admin path: ${path} (HTTP 200)`, 'success');
-            }
-        }
-
-        log("Analyzing SSL/TLS security...", 'info');
-        await wait(400);
-        log("Identifying Technology Stack...", 'info');
-
-        // Real Backend Call
-        const res = await fetch('/api/scan', {
+        // Submit the scan as a background job, then follow its progress
+        const submitRes = await fetch('/api/scan', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ url })
         });
-        const data = await res.json();
+        const submitted = await submitRes.json();
+        if (!submitRes.ok) throw new Error(submitted.error || `HTTP ${submitRes.status}`);
 
-        await fetch('/api/reports', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(data)
-        });
+        const job = await followScanJob(submitted.jobId);
+        if (job.status !== 'done') throw new Error(job.error || `Scan ${job.status}`);
+        const data = job.results;
 
         log("Scan Complete. Report Generated.", 'success');
         await wait(1000);
@@ -224,25 +194,58 @@ startBtn.addEventListener('click', async () => {
 
 function wait(ms) { return new Promise(r => setTimeout(r, ms)); }
 
+// Streams the job's logs and findings into the terminal, resolves with the finished job
+function followScanJob(jobId) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/scan/${jobId}/events`);
+
+        source.addEventListener('log', e => log(JSON.parse(e.data), 'info'));
+        source.addEventListener('finding', e => {
+            const v = JSON.parse(e.data);
+            const sev = (v.severity || 'info').toUpperCase();
+            log(`[${sev}] ${v.title}`, ['critical', 'high', 'error'].includes(v.severity) ? 'error' : 'success');
+        });
+        source.addEventListener('end', async () => {
+            source.close();
+            try {
+                const res = await fetch(`/api/scan/${jobId}`);
+                resolve(await res.json());
+            } catch (err) {
+                reject(err);
+            }
+        });
+        source.onerror = () => {
+            // EventSource reconnects on its own (with Last-Event-ID) unless the stream is gone
+            if (source.readyState === EventSource.CLOSED) reject(new Error('Scan stream closed'));
+        };
+    });
+}
+
 // --- Reports ---
 let currentReportData = null;
 
-async function loadReports() {
-    // List reports
-    const res = await fetch('/api/reports');
+async function loadReports(cursor = null) {
+    // List reports, one keyset page at a time
+    const res = await fetch(cursor ? `/api/reports?cursor=${cursor}` : '/api/reports');
     const reports = await res.json();
+    const nextCursor = res.headers.get('X-Next-Cursor');
 
     const container = document.getElementById('allReportsGrid');
-    container.innerHTML = '';
-    document.getElementById('reportListContainer').classList.remove('hidden');
-    document.getElementById('reportDetailContainer').classList.add('hidden');
+    const oldMore = document.getElementById('btnMoreReports');
+    if (oldMore) oldMore.remove();
+
+    if (!cursor) {
+        container.innerHTML = '';
+        document.getElementById('reportListContainer').classList.remove('hidden');
+        document.getElementById('reportDetailContainer').classList.add('hidden');
 
-    // Hide download button in list view
-    document.getElementById('btnDownloadReport').style.display = 'none';
+        // Hide download button in list view
+        document.getElementById('btnDownloadReport').style.display = 'none';
 
-    if (reports.length === 0) {
-        container.appendChild(document.getElementById('template-empty-state').content.cloneNode(true));
-        return;
+        if (reports.length === 0) {
+            container.appendChild(document.getElementById('template-empty-state').content.cloneNode(true));
+            return;
+        }
     }
 
     reports.forEach(r => {
@@ -264,6 +267,15 @@ async function loadReports() {
 
         container.appendChild(tmpl);
     });
+
+    if (nextCursor) {
+        const more = document.createElement('button');
+        more.id = 'btnMoreReports';
+        more.className = 'btn-new-scan';
+        more.textContent = 'LOAD MORE';
+        more.onclick = () => loadReports(nextCursor);
+        container.appendChild(more);
+    }
 }
 
 async function fetchAndShowReport(id) {
@@ -344,7 +356,7 @@ document.getElementById('btnDownloadReport').addEventListener('click', () => {
 // --- Utils ---
 async function loadRecent() {
     try {
-        const res = await fetch('/api/reports');
+        const res = await fetch('/api/reports?limit=5');
         const reports = await res.json();
         const tbody = document.querySelector('#recentTable tbody');
         if (!tbody) return;
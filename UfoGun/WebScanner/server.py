@@ -1,13 +1,38 @@
-import os
 import requests
 import json
+import hashlib
 import socket
 import ssl
-import concurrent.futures
-from urllib.parse import urlparse
-from flask import Flask, send_from_directory, request, jsonify
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urlencode
+from flask import Flask, Response, send_from_directory, request, jsonify
 import database  # Import custom database module
+from page_document import get_document
+from http_client import ResponseCache, create_session, shared_session
+from ratelimit import AdaptiveRateLimiter
+from metrics import ScanMetrics, REGISTRY
+from budget import ScanBudget, BudgetExceeded
+from jobs import JobManager, BatchManager, QueueFull
+from signatures import SIGNATURES, scan_response
+from portscan import PortScanner, TOP_PORTS, parse_ports
+from discovery import ContentDiscovery, ADMIN_WORDLIST, iter_paths
+
+# Scan job limits
+MAX_CONCURRENT_SCANS = 2
+MAX_PENDING_SCANS = 20
+
+# Per-scan budget defaults (settings: scan_timeout in minutes, max_requests; 0 disables either)
+DEFAULT_SCAN_TIMEOUT_MIN = 10
+DEFAULT_MAX_REQUESTS = 20000
+# Response body cap in KB (setting max_body_kb; 0 reads bodies in full)
+DEFAULT_MAX_BODY_KB = 1024
+
+# Batch scan limits (shared by all running batches)
+MAX_BATCH_SCANS = 4
+MAX_BATCH_SCANS_PER_HOST = 1
+
+# List endpoint page sizes
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
 app = Flask(__name__, static_folder='.')
 
@@ -22,19 +47,46 @@ def static_files(path):
 @app.route('/api/reset_db', methods=['POST'])
 def reset_database_api():
     try:
-        import os
-        if os.path.exists(database.DB_NAME):
-            os.remove(database.DB_NAME)
-        database.init_db()
+        database.reset_db()
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # --- Database API Routes ---
 
+def paged_list(table, fetch):
+    """
+    Serves a keyset-paginated list. The body stays a plain JSON array; the
+    cursor for the next page is sent in X-Next-Cursor (and a Link header).
+    The ETag only depends on the table's change counter and the query, so an
+    unchanged list is answered with 304 before SQLite is touched.
+    """
+    query = request.query_string.decode()
+    etag = hashlib.sha1(f"{table}:{database.data_version(table)}:{query}".encode()).hexdigest()[:20]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor', type=int)
+    rows = fetch(limit + 1, cursor)
+
+    response = jsonify(rows[:limit])
+    if len(rows) > limit:
+        next_cursor = rows[limit - 1]["id"]
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+        response.headers["Link"] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 @app.route('/api/targets', methods=['GET'])
 def list_targets():
-    return jsonify(database.get_targets())
+    url = request.args.get('url')
+    return paged_list('targets', lambda limit, cursor: database.get_targets(limit=limit, before_id=cursor, url=url))
 
 @app.route('/api/targets', methods=['POST'])
 def create_target():
@@ -61,7 +113,15 @@ def clear_all_targets():
 
 @app.route('/api/reports', methods=['GET'])
 def list_reports():
-    return jsonify(database.get_reports())
+    args = request.args
+    return paged_list('reports', lambda limit, cursor: database.get_reports(
+        limit=limit,
+        before_id=cursor,
+        url=args.get('url'),
+        date_from=args.get('from'),
+        date_to=args.get('to'),
+        min_vulns=args.get('min_vulns', type=int)
+    ))
 
 @app.route('/api/reports', methods=['POST'])
 def create_report():
@@ -89,6 +149,38 @@ def get_report(report_id):
         return jsonify(report)
     return jsonify({"error": "Report not found"}), 404
 
+@app.route('/api/findings', methods=['GET'])
+def list_findings():
+    args = request.args
+    try:
+        findings = database.query_findings(
+            severity=args.get('severity'),
+            title=args.get('title'),
+            host=args.get('host'),
+            report_id=args.get('report', type=int),
+            last_reports=args.get('last', type=int),
+            limit=min(args.get('limit', 100, type=int), 1000),
+            offset=args.get('offset', 0, type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(findings)
+
+@app.route('/api/findings/summary', methods=['GET'])
+def summarize_findings():
+    args = request.args
+    try:
+        summary = database.aggregate_findings(
+            group_by=args.get('group_by', 'severity'),
+            severity=args.get('severity'),
+            title=args.get('title'),
+            host=args.get('host'),
+            last_reports=args.get('last', type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(summary)
+
 @app.route('/api/settings', methods=['GET'])
 def get_settings_api():
     return jsonify(database.get_settings())
@@ -135,18 +227,18 @@ def analyze_headers(headers):
     return issues
 
 def analyze_html(html_content, base_url):
-    soup = BeautifulSoup(html_content, 'html.parser')
+    doc = get_document(base_url, html_content)
     issues = []
     logs = []
 
     # Form analizi
-    forms = soup.find_all('form')
+    forms = doc.forms
     if forms:
         logs.append(f"Tespit: Sayfada {len(forms)} adet form bulundu.")
         for i, form in enumerate(forms):
-            action = form.get('action', '')
-            method = form.get('method', 'get').upper()
-            inputs = form.find_all('input')
+            action = form["action"]
+            method = form["method"]
+            inputs = form["inputs"]
             
             issues.append({
                 "title": f"Form Tespit Edildi ({method})",
@@ -157,7 +249,7 @@ def analyze_html(html_content, base_url):
             
             # Basit password input kontrolü
             for inp in inputs:
-                if inp.get('type') == 'password' and method == 'GET':
+                if inp["type"] == 'password' and method == 'GET':
                     issues.append({
                         "title": "Güvensiz Parola İletimi",
                         "severity": "high",
@@ -166,30 +258,15 @@ def analyze_html(html_content, base_url):
                     })
 
     # External resource analysis
-    scripts = soup.find_all('script', src=True)
-    logs.append(f"Tespit: {len(scripts)} adet harici script kaynağı.")
-
-    # 4. Sensitive File Check
-    common_files = ['robots.txt', 'sitemap.xml', '.env', '.git/config', 'backup.sql']
-    for file in common_files:
-        try:
-            file_url = f"{base_url.rstrip('/')}/{file}"
-            resp = requests.head(file_url, timeout=3)
-            if resp.status_code == 200:
-                issues.append({
-                    "title": f"Hassas Dosya Bulundu: {file}",
-                    "severity": "medium",
-                    "desc": f"'{file}' dosyası dışarıdan erişilebilir durumda. İçeriği kontrol edilmeli.",
-                    "path": file_url
-                })
-        except:
-            pass
+    logs.append(f"Tespit: {len(doc.script_srcs)} adet harici script kaynağı.")
 
+    # Sensitive files are checked by the deep scan's content discovery (discovery.py)
     return issues, logs
 
 import re
 
-def check_advanced_vulnerabilities(url, html_content):
+def check_advanced_vulnerabilities(url, html_content, session=None):
+    session = session or shared_session()
     issues = []
     
     # 1. Advanced SQLi / XSS Heuristic (Active-Passive)
@@ -198,18 +275,16 @@ def check_advanced_vulnerabilities(url, html_content):
         try:
             # Safe probe: harmless character
             probe_url = url + "'\""
-            resp = requests.get(probe_url, timeout=3)
+            resp = session.get(probe_url, timeout=3)
             
-            sql_errors = ["syntax error", "mysql_fetch", "ora-", "programming error", "you have an error in your sql syntax"]
-            for err in sql_errors:
-                if err in resp.text.lower():
-                    issues.append({
-                        "title": "Possible SQL Injection",
-                        "severity": "high",
-                        "desc": f"Database error detected in response when probing with quote characters. Error signature: '{err}'",
-                        "path": probe_url
-                    })
-                    break
+            sql_errors = scan_response(resp, 'sqli_heuristic')
+            if sql_errors:
+                issues.append({
+                    "title": "Possible SQL Injection",
+                    "severity": "high",
+                    "desc": f"Database error detected in response when probing with quote characters. Error signature: '{sql_errors[0].signature}'",
+                    "path": probe_url
+                })
         except:
             pass
 
@@ -224,12 +299,7 @@ def check_advanced_vulnerabilities(url, html_content):
         })
 
     # 3. WAF Detection
-    waf_signatures = ['cloudflare', 'sucuri', 'incapsula', 'akamai', 'aws-waf']
-    detected_wafs = []
-    lower_html = html_content.lower()
-    for waf in waf_signatures:
-        if waf in lower_html:
-            detected_wafs.append(waf)
+    detected_wafs = [m.label for m in SIGNATURES.scan(html_content, 'waf')]
             
     if detected_wafs:
          issues.append({
@@ -241,30 +311,16 @@ def check_advanced_vulnerabilities(url, html_content):
 
     return issues
 
-def scan_ports(hostname):
-    open_ports = []
-    # Comprehensive Port List
-    ports = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 993, 995, 1433, 3306, 3389, 5432, 5900, 6379, 8080, 8443]
-    
-    def check_port(port):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.5) 
-            result = sock.connect_ex((hostname, port))
-            sock.close()
-            if result == 0:
-                return port
-        except:
-            pass
-        return None
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        results = executor.map(check_port, ports)
-    
-    for p in results:
-        if p:
-            open_ports.append(p)
-    return open_ports
+def scan_ports(hostname, ports=None, concurrency=500, on_open=None, should_stop=None, rtt_port=None):
+    """
+    Non-blocking connect scan (see portscan.py). Defaults to the classic top ports list.
+    """
+    scanner = PortScanner(concurrency=concurrency)
+    try:
+        return scanner.scan(hostname, ports or TOP_PORTS, on_open=on_open, should_stop=should_stop, rtt_port=rtt_port)
+    except OSError:
+        # Host did not resolve
+        return []
 
 def check_ssl_cert(hostname):
     try:
@@ -281,211 +337,408 @@ def check_ssl_cert(hostname):
     except Exception as e:
         return {"valid": False, "error": str(e)}
 
-def detect_tech_stack(headers, html_content):
+def detect_tech_stack(headers, html_content, url=None):
     techs = []
     # Header Checks
     if 'Server' in headers: techs.append(f"Server: {headers['Server']}")
     if 'X-Powered-By' in headers: techs.append(f"Stack: {headers['X-Powered-By']}")
     
     # HTML Checks
-    soup = BeautifulSoup(html_content, 'html.parser')
-    meta_gen = soup.find('meta', attrs={'name': 'generator'})
-    if meta_gen and meta_gen.get('content'):
-        techs.append(f"Generator: {meta_gen.get('content')}")
+    doc = get_document(url, html_content)
+    if doc.meta_generator:
+        techs.append(f"Generator: {doc.meta_generator}")
     
-    # Framework Signatures
-    html_text = html_content.lower()
-    if 'wp-content' in html_text: techs.append("CMS: WordPress")
-    if 'laravel' in html_text: techs.append("Framework: Laravel")
-    if 'django' in html_text: techs.append("Framework: Django")
-    if 'react' in html_text or 'react-dom' in html_text: techs.append("Frontend: React")
-    if 'vue' in html_text or 'vue.js' in html_text: techs.append("Frontend: Vue.js")
-    if 'bootstrap' in html_text: techs.append("UI: Bootstrap")
+    # Framework Signatures (one pass over the page, see signatures.py)
+    for match in SIGNATURES.scan(html_content, 'tech'):
+        if match.label not in techs:
+            techs.append(match.label)
         
     return techs
 
-def check_admin_pages(base_url):
+def check_admin_pages(base_url, session=None, discovery=None, wordlist=ADMIN_WORDLIST):
+    # Runs through the scan's content discovery, so no path is requested twice
+    discovery = discovery or ContentDiscovery(session or shared_session())
     issues = []
-    # Common admin panel paths
-    admin_paths = [
-        'admin', 'administrator', 'login', 'wp-login.php', 'dashboard', 
-        'cpanel', 'user', 'auth', 'panel', 'management'
-    ]
-    
-    found_paths = []
-    
-    for path in admin_paths:
-        try:
-            full_url = f"{base_url.rstrip('/')}/{path}"
-            # Short timeout to keep scan fast
-            resp = requests.head(full_url, timeout=2, allow_redirects=True)
-            
-            if resp.status_code == 200:
-                found_paths.append(path)
+    try:
+        hits = discovery.run(base_url, iter_paths(wordlist), statuses=(200, 403), allow_redirects=True,
+                             label="Admin Enumeration")
+        for hit in hits:
+            path = hit.path
+            if hit.status == 200:
                 issues.append({
                     "title": f"Admin Panel Detected: /{path}",
                     "severity": "medium",
                     "desc": f"Accessible page found at '{path}'. Vulnerable to brute-force.",
-                    "path": full_url
+                    "path": hit.url
                 })
-            elif resp.status_code == 403:
+            else:
                 issues.append({
                     "title": f"Protected Admin Page: /{path}",
                     "severity": "low",
                     "desc": f"Path '{path}' is forbidden (403), but exists.",
-                    "path": full_url
+                    "path": hit.url
                 })
-        except:
-            pass
+    except OSError:
+        # Unreadable wordlist
+        pass
             
     return issues
 
-@app.route('/api/scan', methods=['POST'])
-def scan_target():
-    data = request.json
-    target_url = data.get('url')
-    
-    if not target_url.startswith('http'):
-        target_url = 'http://' + target_url
-
-    parsed = urlparse(target_url)
-    hostname = parsed.netloc
-
-    results = {
-        "url": target_url,
-        "logs": [],
-        "vulnerabilities": []
-    }
-
-    results["logs"].append(f"SCAN STARTED: {target_url}")
-    results["logs"].append(f"Resolving Host: {hostname}...")
+def run_scan(job):
+    """
+    Runs the full scan for a ScanJob, writing logs and findings into it as each phase finishes.
+    """
+    target_url = job.url
+    hostname = urlparse(target_url).netloc
+
+    job.log(f"SCAN STARTED: {target_url}")
+    job.log(f"Resolving Host: {hostname}...")
+
+    # One pooled session, response cache, rate limiter and metrics per scan, shared with the deep scanner
+    from vulnerability_scanner import AdvancedScanner
+    cache = ResponseCache()
+    limiter = AdaptiveRateLimiter()
+    metrics = ScanMetrics()
+    settings = database.get_settings()
+    budget = ScanBudget(
+        timeout=float(settings.get("scan_timeout") or DEFAULT_SCAN_TIMEOUT_MIN) * 60,
+        max_requests=int(settings.get("max_requests") or DEFAULT_MAX_REQUESTS)
+    )
+    # Response bodies are read up to max_body_kb (0 reads them in full)
+    max_body_kb = int(settings.get("max_body_kb") or DEFAULT_MAX_BODY_KB)
+    session = create_session(pool_size=AdvancedScanner.pool_size(), cache=cache, limiter=limiter, metrics=metrics, budget=budget,
+                             max_body=max_body_kb * 1024 if max_body_kb > 0 else None)
+    # Incremental rescans: pages unchanged since the last completed scan are not probed again
+    parsed_target = urlparse(target_url)
+    previous_pages = {}
+    if settings.get("incremental_rescan", "true") == "true":
+        previous_pages = database.get_page_states(f"{parsed_target.scheme}://{parsed_target.netloc}")
+    # Deep scan findings go straight into the job so they are streamed as they are found
+    scanner = AdvancedScanner(session=session, cancel_event=job.cancel_event, on_finding=job.add_finding,
+                              previous_pages=previous_pages)
+    if settings.get("subdomain_wordlist"):
+        scanner.subdomain_wordlist = settings["subdomain_wordlist"]
+    # Content discovery: own sensitive-file wordlist and extensions to try ("php,bak")
+    if settings.get("discovery_wordlist"):
+        scanner.sensitive_wordlist = settings["discovery_wordlist"]
+    if settings.get("discovery_extensions"):
+        scanner.discovery_extensions = [ext.strip() for ext in settings["discovery_extensions"].split(',') if ext.strip()]
+    if settings.get("probe_per_cluster"):
+        scanner.probe_per_cluster = max(1, int(settings["probe_per_cluster"]))
+
+    def checkpoint():
+        # Between phases: stop on cancellation, or with partial results once the budget is used up
+        job.check_cancelled()
+        budget.check()
 
     try:
         # 1. Connection & Recon
+        metrics.phase("dns")
         try:
             ip_addr = socket.gethostbyname(hostname)
-            results["logs"].append(f"Target IP: {ip_addr}")
+            job.log(f"Target IP: {ip_addr}")
         except:
-            results["logs"].append("DNS Resolution Failed")
+            job.log("DNS Resolution Failed")
             
-        start_time = requests.get(target_url, timeout=5).elapsed.total_seconds()
-        response = requests.get(target_url, timeout=10)
-        results["logs"].append(f"Target is UP (HTTP {response.status_code}) - Latency: {start_time:.3f}s")
+        metrics.phase("http_probe")
+        response = session.get(target_url, timeout=10)
+        start_time = response.elapsed.total_seconds()
+        job.log(f"Target is UP (HTTP {response.status_code}) - Latency: {start_time:.3f}s")
+        checkpoint()
         
-        # 2. Port Scan
-        results["logs"].append("Initiating Port Scan (Top 20)...")
-        open_ports = scan_ports(hostname)
-        if open_ports:
-            results["vulnerabilities"].append({
-                "title": f"Open Ports Detected ({len(open_ports)})",
+        # 2. Passive analysis of the first response (no extra requests), cheapest first
+        # Tech Stack Recon
+        metrics.phase("tech_stack")
+        tech_stack = detect_tech_stack(response.headers, response.text, target_url)
+        if tech_stack:
+            job.add_finding({
+                "title": "Technology Stack",
                 "severity": "info",
-                "desc": f"Services found: {', '.join(map(str, open_ports))}",
-                "path": f"Ports: {open_ports}"
+                "desc": "Detected: " + ", ".join(tech_stack),
+                "path": "Recon"
+            })
+            job.log(f"Tech Stack: {tech_stack}")
+
+        # Header Analysis
+        metrics.phase("headers")
+        job.add_findings(analyze_headers(response.headers))
+
+        # WAF Detection
+        metrics.phase("waf_osint")
+        detected_wafs = [m.label for m in scan_response(response, 'waf')]
+        if detected_wafs:
+             job.add_finding({
+                "title": "WAF Detected",
+                "severity": "info",
+                "desc": f"Web Application Firewall signature found: {', '.join(detected_wafs)}",
+                "path": "Kind: " + ", ".join(detected_wafs)
             })
-            results["logs"].append(f"OPEN PORTS: {open_ports}")
-        else:
-            results["logs"].append("No common open ports found (Firewalled?)")
 
-        # 3. SSL Check
+        # Email OSINT
+        import re
+        emails = set(re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', response.text))
+        if emails:
+            job.add_finding({
+                "title": f"Information Disclosure: Emails ({len(emails)})",
+                "severity": "info",
+                "desc": "Public email addresses found: " + ", ".join(list(emails)[:5]),
+                "path": "Source Code"
+            })
+
+        # SSL Check (one handshake)
+        metrics.phase("ssl")
         if target_url.startswith('https'):
-            results["logs"].append("Analyzing SSL Certificate...")
+            job.log("Analyzing SSL Certificate...")
             ssl_info = check_ssl_cert(hostname)
             if ssl_info.get("valid"):
                 issuer = ssl_info.get('issuer', {}).get('organizationName', 'Unknown')
-                results["logs"].append(f"SSL Valid. Issuer: {issuer}")
-                results["vulnerabilities"].append({
+                job.log(f"SSL Valid. Issuer: {issuer}")
+                job.add_finding({
                     "title": "SSL Certificate Info",
                     "severity": "info",
                     "desc": f"Issued by: {issuer}. Version: {ssl_info.get('version')}",
                     "path": "SSL"
                 })
             else:
-                results["vulnerabilities"].append({
+                job.add_finding({
                     "title": "SSL/TLS Issue",
                     "severity": "high",
                     "desc": f"Certificate Error: {ssl_info.get('error')}",
                     "path": "SSL Handshake"
                 })
 
-        # 4. Tech Stack Recon
-        tech_stack = detect_tech_stack(response.headers, response.text)
-        if tech_stack:
-            results["vulnerabilities"].append({
-                "title": "Technology Stack",
-                "severity": "info",
-                "desc": "Detected: " + ", ".join(tech_stack),
-                "path": "Recon"
-            })
-            results["logs"].append(f"Tech Stack: {tech_stack}")
-
-        # 5. Header Analysis
-        header_issues = analyze_headers(response.headers)
-        results["vulnerabilities"].extend(header_issues)
-
-        # 6. Content Analysis
-        html_issues, html_logs = analyze_html(response.text, target_url)
-        results["vulnerabilities"].extend(html_issues)
+        # 3. Advanced Analysis (SQLi, XSS, LFI...): the critical findings, so it gets the budget first
+        checkpoint()
+        job.log("Performing Deep Threat Analysis (Crawling & Fuzzing)...")
+        metrics.phase("deep_scan")
         
-        # 7. Advanced Analysis (SQLi, WAF, OSINT, XSS, LFI)
-        results["logs"].append("Performing Deep Threat Analysis (Crawling & Fuzzing)...")
-        
-        # Use the new module
-        from vulnerability_scanner import AdvancedScanner
-        scanner = AdvancedScanner()
         deep_issues = scanner.perform_scan(target_url)
+        job.check_cancelled()
+        # Only a completed deep scan may serve as the baseline of the next rescan
+        database.save_page_states(scanner.page_states)
+        if scanner.clustered_pages:
+            job.log(f"URL clustering: {scanner.clustered_pages} pages skipped (same route template as a probed page).")
+        if previous_pages:
+            job.log(f"Incremental rescan: {len(scanner.unchanged_pages)} of {len(scanner.pages)} pages unchanged, findings carried forward.")
         
-        results["vulnerabilities"].extend(deep_issues)
         if deep_issues:
-             results["logs"].append(f"Deep Scan detected {len(deep_issues)} critical items.")
+             job.log(f"Deep Scan detected {len(deep_issues)} critical items.")
+        budget.check()
         
-        # Keep the WAF and Email checks from the old function as they are useful OSINT
-        # We can quickly re-implement or call a stripped down version if needed, 
-        # but for now let's just rely on the new scanner + the existing header/admin checks.
-        # Check WAF specifically here if not in new scanner
-        waf_signatures = ['cloudflare', 'sucuri', 'incapsula', 'akamai', 'aws-waf']
-        detected_wafs = []
-        lower_html = response.text.lower()
-        for waf in waf_signatures:
-            if waf in lower_html:
-                detected_wafs.append(waf)
-        if detected_wafs:
-             results["vulnerabilities"].append({
-                "title": "WAF Detected",
-                "severity": "info",
-                "desc": f"Web Application Firewall signature found: {', '.join(detected_wafs)}",
-                "path": "Kind: " + ", ".join(detected_wafs)
-            })
+        # 4. Content Analysis
+        metrics.phase("html_analysis")
+        html_issues, html_logs = analyze_html(response.text, target_url)
+        job.add_findings(html_issues)
+        checkpoint()
+        
+        # 5. Admin Enumeration
+        job.log("Enumerating Admin Paths...")
+        metrics.phase("admin_enum")
+        # Shares the deep scan's discovery: one soft-404 baseline, and no path requested twice
+        admin_issues = check_admin_pages(target_url, session, scanner.discovery)
+        job.add_findings(admin_issues)
+        if admin_issues:
+            job.log(f"Found {len(admin_issues)} administrative paths.")
+        checkpoint()
 
-        # Email OSINT
-        import re
-        emails = set(re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', response.text))
-        if emails:
-            results["vulnerabilities"].append({
-                "title": f"Information Disclosure: Emails ({len(emails)})",
+        # 6. Port Scan: info only and the longest phase with a full range, so it runs last
+        # (range from the port_range setting, e.g. "1-65535"; default is the top list)
+        metrics.phase("port_scan")
+        parsed = urlparse(target_url)
+        try:
+            ports = parse_ports(settings.get("port_range", "top"))
+        except ValueError:
+            ports = list(TOP_PORTS)
+        job.log(f"Initiating Port Scan ({len(ports)} ports)...")
+        open_ports = scan_ports(
+            parsed.hostname or hostname,
+            ports,
+            concurrency=int(settings.get("port_concurrency", 500)),
+            on_open=lambda port: job.log(f"Port {port} open"),
+            should_stop=lambda: job.cancel_event.is_set() or budget.exhausted,
+            rtt_port=parsed.port or (443 if parsed.scheme == 'https' else 80)
+        )
+        if open_ports:
+            job.add_finding({
+                "title": f"Open Ports Detected ({len(open_ports)})",
                 "severity": "info",
-                "desc": "Public email addresses found: " + ", ".join(list(emails)[:5]),
-                "path": "Source Code"
+                "desc": f"Services found: {', '.join(map(str, open_ports))}",
+                "path": f"Ports: {open_ports}"
             })
+            job.log(f"OPEN PORTS: {open_ports}")
+        else:
+            job.log("No common open ports found (Firewalled?)")
+        checkpoint()
 
-        # 8. Admin Enumeration
-        results["logs"].append("Enumerating Admin Paths...")
-        admin_issues = check_admin_pages(target_url)
-        results["vulnerabilities"].extend(admin_issues)
-        if admin_issues:
-            results["logs"].append(f"Found {len(admin_issues)} administrative paths.")
-
-        results["logs"].append("FULL SCAN COMPLETED.")
+        job.log("FULL SCAN COMPLETED.")
         
+    except BudgetExceeded as e:
+        job.log(f"SCAN INCOMPLETE: {e}. Partial results are kept.")
+        job.set_result("incomplete", True)
+        job.set_result("incompleteReason", budget.reason)
     except requests.exceptions.RequestException as e:
-        results["logs"].append(f"HATA: Hedefe ulaşılamadı. {str(e)}")
-        results["vulnerabilities"].append({
+        job.log(f"HATA: Hedefe ulaşılamadı. {str(e)}")
+        job.add_finding({
             "title": "Bağlantı Hatası",
             "severity": "error",
             "desc": str(e),
             "path": target_url
         })
+    finally:
+        job.set_result("budget", budget.to_dict())
+        stats = cache.stats()
+        job.set_result("cache", stats)
+        job.log(f"Response cache: {stats['hits']} hits / {stats['misses']} misses")
+        metrics.finish()
+        scan_metrics = metrics.to_dict()
+        job.set_result("metrics", scan_metrics)
+        REGISTRY.observe(scan_metrics)
+        slowest = sorted(scan_metrics["phases"], key=lambda p: p["wall_s"], reverse=True)[:3]
+        job.log("Slowest phases: " + ", ".join(f"{p['name']} {p['wall_s']}s / {p['requests']} req" for p in slowest))
+        rates = limiter.stats()
+        job.set_result("rate_limit", rates)
+        for host, host_stats in rates.items():
+            job.log(f"Rate limit {host}: {host_stats['rate']} req/s, {host_stats['decreases']} slowdowns, {host_stats['throttled']} x 429")
+
+    return job.snapshot()
+
+# --- Scan Job API ---
+
+scan_jobs = JobManager(run_scan, max_workers=MAX_CONCURRENT_SCANS, max_pending=MAX_PENDING_SCANS)
+batch_jobs = BatchManager(scan_jobs, max_workers=MAX_BATCH_SCANS, per_host=MAX_BATCH_SCANS_PER_HOST)
+
+@app.route('/api/scan', methods=['POST'])
+def scan_target():
+    data = request.json or {}
+    target_url = data.get('url')
+    if not target_url:
+        return jsonify({"error": "URL missing"}), 400
     
-    return jsonify(results)
+    if not target_url.startswith('http'):
+        target_url = 'http://' + target_url
+
+    try:
+        job = scan_jobs.submit(target_url)
+    except QueueFull:
+        return jsonify({"error": "Scan queue is full, try again later"}), 429
+
+    return jsonify({"jobId": job.id, "status": job.status}), 202
+
+@app.route('/api/scan/jobs', methods=['GET'])
+def list_scan_jobs():
+    return jsonify([job.to_dict(include_results=False) for job in scan_jobs.list()])
+
+@app.route('/api/scan/<job_id>', methods=['GET'])
+def get_scan_job(job_id):
+    job = scan_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/scan/<job_id>/events', methods=['GET'])
+def stream_scan_job(job_id):
+    """
+    Server-Sent Events stream of a job's logs, findings and status changes.
+    Clients reconnecting with Last-Event-ID only receive the events they missed.
+    """
+    job = scan_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_id = 0
+
+    def generate():
+        sent = last_id
+        while True:
+            events = job.wait_events(sent)
+            if not events:
+                if job.finished:
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event_type, data in events:
+                yield f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+                sent = event_id
+            if job.finished and sent >= len(job.events):
+                break
+        yield "event: end\ndata: {}\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/scan/<job_id>/cancel', methods=['POST'])
+def cancel_scan_job(job_id):
+    job = scan_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict(include_results=False))
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint: totals per phase and per check over all finished scans.
+    """
+    statuses = {}
+    for job in scan_jobs.list():
+        statuses[job.status] = statuses.get(job.status, 0) + 1
+    body = REGISTRY.render(gauges={"ufogun_scan_jobs": ("Known scan jobs by status.", statuses)})
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/batch', methods=['POST'])
+def start_batch_scan():
+    """
+    Scans stored targets as one batch: {"targetIds": [...]} selects targets,
+    an empty body scans all of them. One report is saved per target.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid request body"}), 400
+    target_ids = data.get('targetIds')
+    if target_ids is not None:
+        # Client JSON: ids may arrive as numbers or numeric strings, anything else is rejected
+        try:
+            if not isinstance(target_ids, list) or any(isinstance(i, bool) for i in target_ids):
+                raise TypeError()
+            wanted = set(int(i) for i in target_ids)
+        except (TypeError, ValueError):
+            return jsonify({"error": "targetIds must be a list of target ids"}), 400
+    targets = database.get_targets()
+    if target_ids is not None:
+        targets = [t for t in targets if t["id"] in wanted]
+    if not targets:
+        return jsonify({"error": "No targets to scan"}), 400
+
+    urls = []
+    # Oldest target first
+    for target in reversed(targets):
+        url = target["url"]
+        if not url.startswith('http'):
+            url = 'http://' + url
+        urls.append(url)
+
+    batch = batch_jobs.submit(urls)
+    return jsonify({"batchId": batch.id, "status": batch.status, "total": len(batch.jobs)}), 202
+
+@app.route('/api/batch', methods=['GET'])
+def list_batch_scans():
+    return jsonify([batch.to_dict(include_jobs=False) for batch in batch_jobs.list()])
+
+@app.route('/api/batch/<batch_id>', methods=['GET'])
+def get_batch_scan(batch_id):
+    batch = batch_jobs.get(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+    return jsonify(batch.to_dict())
+
+@app.route('/api/batch/<batch_id>/cancel', methods=['POST'])
+def cancel_batch_scan(batch_id):
+    batch = batch_jobs.cancel(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+    return jsonify(batch.to_dict(include_jobs=False))
 
 if __name__ == '__main__':
     print("Server http://127.0.0.1:5000 adresinde çalışıyor...")
@@ -0,0 +1,158 @@
+import re
+import threading
+from collections import namedtuple
+
+SignatureMatch = namedtuple('SignatureMatch', ['category', 'signature', 'label'])
+
+
+class SignatureRegistry:
+    """
+    Registry of literal response signatures, compiled into one combined regex.
+    A body is scanned once for every registered signature; results come back
+    in registration order so "first match" keeps the order of the old lists.
+    """
+
+    def __init__(self):
+        self._signatures = []  # (category, signature, label)
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    def register(self, category, signature, label=None):
+        with self._lock:
+            self._signatures.append((category, signature.lower(), label or signature))
+            self._compiled = None
+
+    def register_many(self, category, signatures):
+        for sig in signatures:
+            if isinstance(sig, tuple):
+                self.register(category, sig[0], sig[1])
+            else:
+                self.register(category, sig)
+
+    def _compile(self):
+        with self._lock:
+            if self._compiled is not None:
+                return self._compiled
+
+            by_text = {}
+            for index, (category, sig, label) in enumerate(self._signatures):
+                by_text.setdefault(sig, []).append((index, SignatureMatch(category, sig, label)))
+
+            texts = sorted(by_text, key=len, reverse=True)
+            # A zero-width lookahead tries the alternation at every offset, so
+            # overlapping signatures are all seen. Signatures that are a prefix of
+            # a longer one starting at the same offset are added back below.
+            # Case-sensitive over the lowered body: with re.IGNORECASE, Unicode case variants
+            # ("İ", "ſ") match a signature while lowering to a different string.
+            pattern = re.compile('(?=(' + '|'.join(re.escape(t) for t in texts) + '))')
+            prefixes = {t: [p for p in texts if p != t and t.startswith(p)] for t in texts}
+
+            self._compiled = (pattern, by_text, prefixes)
+            return self._compiled
+
+    def scan(self, text, category=None):
+        """
+        Returns every SignatureMatch found in text, optionally limited to one category.
+        """
+        if not text or not self._signatures:
+            return []
+        pattern, by_text, prefixes = self._compile()
+
+        found = set()
+        for m in pattern.finditer(text.lower()):
+            hit = m.group(1)
+            if hit in found:
+                continue
+            found.add(hit)
+            found.update(prefixes[hit])
+
+        matches = []
+        for sig in found:
+            matches.extend(by_text[sig])
+        matches.sort(key=lambda item: item[0])
+        return [match for _, match in matches if category is None or match.category == category]
+
+    def first(self, text, category):
+        matches = self.scan(text, category)
+        return matches[0] if matches else None
+
+    def matcher(self, category):
+        """
+        ChunkMatcher for the signatures of one category, for early termination of streamed reads.
+        """
+        with self._lock:
+            signatures = [sig for cat, sig, _ in self._signatures if cat == category]
+        return ChunkMatcher(signatures, ignore_case=True)
+
+
+class ChunkMatcher:
+    """
+    Incremental search for literal strings in a body read chunk by chunk
+    (the `stop` callback of http_client.read_body). The last characters of
+    each chunk are kept, so a string split across two chunks is still found.
+    Returns True, and keeps the string in `found`, once any of them was seen.
+    """
+
+    def __init__(self, needles, ignore_case=False):
+        self.ignore_case = ignore_case
+        self.needles = [n.lower() if ignore_case else n for n in needles if n]
+        self.keep = max((len(n) for n in self.needles), default=1) - 1
+        self.found = None
+        self._tail = ''
+
+    def __call__(self, chunk):
+        if self.found is not None:
+            return True
+        window = self._tail + (chunk.lower() if self.ignore_case else chunk)
+        for needle in self.needles:
+            if needle in window:
+                self.found = needle
+                return True
+        self._tail = window[max(0, len(window) - self.keep):] if self.keep else ''
+        return False
+
+
+def scan_response(res, category=None):
+    """
+    Scans a response body once and remembers the result on the response,
+    so several checks looking at the same response share one pass.
+    """
+    matches = getattr(res, '_signature_matches', None)
+    if matches is None:
+        matches = SIGNATURES.scan(res.text)
+        res._signature_matches = matches
+    return [m for m in matches if category is None or m.category == category]
+
+
+SIGNATURES = SignatureRegistry()
+
+# Database errors confirmed by an injected payload
+SIGNATURES.register_many('sqli', [
+    "you have an error in your sql syntax",
+    "warning: mysql",
+    "unclosed quotation mark after the character string",
+    "quoted string not properly terminated",
+    "sql syntax error",
+    "pg_query(): query failed: error"
+])
+
+# Looser database error hints used by the quote-probe heuristic
+SIGNATURES.register_many('sqli_heuristic', [
+    "syntax error", "mysql_fetch", "ora-", "programming error", "you have an error in your sql syntax"
+])
+
+SIGNATURES.register_many('lfi', ["root:x:0:0", "[extensions]", "[fonts]"])
+SIGNATURES.register_many('rce', ["root:x:0:0", "[extensions]"])
+
+SIGNATURES.register_many('waf', ['cloudflare', 'sucuri', 'incapsula', 'akamai', 'aws-waf'])
+
+SIGNATURES.register_many('tech', [
+    ('wp-content', "CMS: WordPress"),
+    ('laravel', "Framework: Laravel"),
+    ('django', "Framework: Django"),
+    ('react', "Frontend: React"),
+    ('react-dom', "Frontend: React"),
+    ('vue', "Frontend: Vue.js"),
+    ('vue.js', "Frontend: Vue.js"),
+    ('bootstrap', "UI: Bootstrap")
+])
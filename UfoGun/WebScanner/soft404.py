@@ -0,0 +1,127 @@
+import uuid
+import hashlib
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit, urljoin, unquote
+import requests
+
+# A few made-up paths per host: a bare name, a script and a directory, since
+# many servers route these differently
+BASELINE_SHAPES = ('{token}', '{token}.php', '{token}/')
+
+# Body lengths are compared in buckets of this many bytes (neighbouring buckets match)
+LENGTH_BUCKET = 256
+
+# Bodies are fingerprinted on their first bytes only
+BASELINE_PEEK = 64 * 1024
+
+Fingerprint = namedtuple('Fingerprint', ['status', 'length_bucket', 'body_hash', 'redirect'])
+
+
+def _strip_path(body, url):
+    # Error pages often echo the requested path; with it removed they hash the same for every path.
+    # Longest echo first: removing "abc" before "/abc/" would leave "//" behind.
+    path = urlsplit(url).path
+    echoes = {path, unquote(path), path.strip('/'), path.rstrip('/').rsplit('/', 1)[-1]}
+    for echo in sorted(echoes, key=lambda e: (-len(e), e)):
+        if len(echo) > 1:
+            body = body.replace(echo.encode('utf-8', 'ignore'), b'')
+    return body
+
+
+def _redirect_target(url, response):
+    if response.history:
+        target = response.url
+    elif response.is_redirect:
+        target = urljoin(url, response.headers.get('Location', ''))
+    else:
+        return None
+    # "/login?next=/missing" for every missing path -> one target
+    path = urlsplit(url).path
+    return target.replace(path, '{path}') if len(path) > 1 else target
+
+
+def fingerprint(url, response):
+    body = _strip_path(response.content or b'', url)
+    return Fingerprint(
+        response.status_code,
+        len(body) // LENGTH_BUCKET,
+        hashlib.sha1(body).hexdigest(),
+        _redirect_target(url, response)
+    )
+
+
+class HostBaseline:
+    """
+    What a host answers for paths that do not exist: the fingerprints of a few
+    random paths, and the statuses whose body changed between them (dynamic
+    pages, which are then matched on their length bucket instead of the hash).
+    """
+
+    def __init__(self, fingerprints):
+        self.fingerprints = fingerprints
+        self.dynamic_statuses = set()
+        hashes = {}
+        for fp in fingerprints:
+            hashes.setdefault(fp.status, set()).add(fp.body_hash)
+        for status, seen in hashes.items():
+            if len(seen) > 1:
+                self.dynamic_statuses.add(status)
+
+    def matches(self, fp):
+        for known in self.fingerprints:
+            if known.status != fp.status:
+                continue
+            if known.redirect is not None or fp.redirect is not None:
+                if known.redirect == fp.redirect:
+                    return True
+                continue
+            if known.body_hash == fp.body_hash:
+                return True
+            if fp.status in self.dynamic_statuses and abs(known.length_bucket - fp.length_bucket) <= 1:
+                return True
+        return False
+
+
+class Soft404Detector:
+    """
+    Tells real discovery hits from a host's "not found" answers.
+    The first time a host (and redirect policy) is seen it is fingerprinted
+    with random paths; every later response is classified against that
+    baseline without further requests. Catch-all sites that answer every
+    path with 200, a redirect to the login page or a 403 then stop looking
+    like they expose every file. Shared by the checks of one scan.
+    """
+
+    def __init__(self, session, timeout=3):
+        self.session = session
+        self.timeout = timeout
+        self._baselines = {}
+        self._lock = threading.Lock()
+
+    def baseline(self, url, allow_redirects=False):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc, allow_redirects)
+        with self._lock:
+            if key not in self._baselines:
+                self._baselines[key] = self._learn(f"{parts.scheme}://{parts.netloc}/", allow_redirects)
+            return self._baselines[key]
+
+    def _learn(self, origin, allow_redirects):
+        fingerprints = []
+        for shape in BASELINE_SHAPES:
+            probe_url = origin + shape.format(token=uuid.uuid4().hex[:12])
+            try:
+                res = self.session.get(probe_url, timeout=self.timeout, allow_redirects=allow_redirects, max_bytes=BASELINE_PEEK)
+            except requests.exceptions.RequestException:
+                continue
+            fingerprints.append(fingerprint(probe_url, res))
+        return HostBaseline(fingerprints)
+
+    def exists(self, url, response, allow_redirects=False):
+        """
+        False for 404/410 and for responses that look like the host's answer to a missing path.
+        """
+        if response.status_code in (404, 410):
+            return False
+        return not self.baseline(url, allow_redirects).matches(fingerprint(url, response))
@@ -0,0 +1,285 @@
+import os
+import time
+import random
+import socket
+import string
+import struct
+import asyncio
+import threading
+
+WORDLIST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordlists')
+DEFAULT_WORDLIST = os.path.join(WORDLIST_DIR, 'subdomains.txt')
+
+DEFAULT_TTL = 300
+NEGATIVE_TTL = 60
+MAX_CACHE_ENTRIES = 200000
+
+
+def iter_wordlist(path):
+    """
+    Streams subdomain labels from a wordlist file, one per line.
+    Blank lines and '#' comments are skipped; the file is never loaded whole.
+    """
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            word = line.strip().lower().strip('.')
+            if word and not word.startswith('#'):
+                yield word
+
+
+class DnsCache:
+    """
+    Thread-safe hostname -> addresses cache honouring record TTLs.
+    Failed lookups are cached too (as None) for NEGATIVE_TTL seconds.
+    """
+
+    def __init__(self, max_entries=MAX_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, hostname):
+        """
+        Returns (hit, addresses); addresses is None for a cached failure.
+        """
+        with self._lock:
+            entry = self._entries.get(hostname)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._entries[hostname]
+                return False, None
+            return True, entry[1]
+
+    def put(self, hostname, addresses, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries first, then the oldest ones
+                now = time.monotonic()
+                for key in [k for k, v in self._entries.items() if v[0] < now]:
+                    del self._entries[key]
+                while len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[hostname] = (time.monotonic() + ttl, addresses)
+
+
+# Shared across scans so repeated enumerations of a domain stay cheap
+DNS_CACHE = DnsCache()
+
+
+# --- DNS wire format (A queries only) ---
+
+def build_query(query_id, hostname):
+    header = struct.pack('>HHHHHH', query_id, 0x0100, 1, 0, 0, 0)  # RD set, one question
+    qname = b''.join(bytes([len(label)]) + label.encode('idna') for label in hostname.rstrip('.').split('.'))
+    return header + qname + b'\x00' + struct.pack('>HH', 1, 1)  # QTYPE=A, QCLASS=IN
+
+
+def _skip_name(data, offset):
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:  # compression pointer
+            return offset + 2
+        offset += length + 1
+
+
+def parse_response(data):
+    """
+    Returns (query_id, rcode, addresses, ttl) for a DNS response packet.
+    """
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack('>HHHHHH', data[:12])
+    rcode = flags & 0x000F
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    addresses = []
+    ttl = None
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, record_ttl, rdlength = struct.unpack('>HHIH', data[offset:offset + 10])
+        offset += 10
+        if rtype == 1 and rdlength == 4:
+            addresses.append(socket.inet_ntoa(data[offset:offset + 4]))
+            ttl = record_ttl if ttl is None else min(ttl, record_ttl)
+        offset += rdlength
+    return query_id, rcode, addresses, ttl
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, pending):
+        self.pending = pending
+
+    def datagram_received(self, data, addr):
+        try:
+            parsed = parse_response(data)
+        except Exception:
+            return
+        future = self.pending.pop(parsed[0], None)
+        if future is not None and not future.done():
+            future.set_result(parsed)
+
+    def error_received(self, exc):
+        pass
+
+
+class UdpResolver:
+    """
+    Asynchronous stub resolver speaking plain DNS over UDP to one nameserver.
+    Thousands of queries share one socket, matched back by query id.
+    """
+
+    def __init__(self, nameserver, port=53, timeout=2.0, retries=1):
+        self.nameserver = (nameserver, port)
+        self.timeout = timeout
+        self.retries = retries
+        self._transport = None
+        self._pending = {}
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._pending = {}
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DnsProtocol(self._pending), remote_addr=self.nameserver)
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def resolve(self, hostname):
+        """
+        Returns (addresses or None, ttl).
+        """
+        loop = asyncio.get_running_loop()
+        for _ in range(self.retries + 1):
+            query_id = random.randint(0, 0xFFFF)
+            while query_id in self._pending:
+                query_id = random.randint(0, 0xFFFF)
+            future = loop.create_future()
+            self._pending[query_id] = future
+            self._transport.sendto(build_query(query_id, hostname))
+            try:
+                _, rcode, addresses, ttl = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                self._pending.pop(query_id, None)
+                continue
+            if rcode == 0 and addresses:
+                return addresses, ttl if ttl is not None else DEFAULT_TTL
+            return None, NEGATIVE_TTL
+        return None, NEGATIVE_TTL
+
+
+class SystemResolver:
+    """
+    Fallback resolver using the OS (getaddrinfo on the default executor).
+    No TTLs are available, so DEFAULT_TTL is used.
+    """
+
+    async def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def resolve(self, hostname):
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(hostname, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            return None, NEGATIVE_TTL
+        return sorted(set(info[4][0] for info in infos)), DEFAULT_TTL
+
+
+def system_nameserver(resolv_conf='/etc/resolv.conf'):
+    try:
+        with open(resolv_conf) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver' and '.' in parts[1]:
+                    return parts[1]
+    except OSError:
+        pass
+    return None
+
+
+def default_resolver():
+    nameserver = system_nameserver()
+    if nameserver:
+        return UdpResolver(nameserver)
+    return SystemResolver()
+
+
+def random_label(length=16):
+    return ''.join(random.choice(string.ascii_lowercase + string.digits) for _ in range(length))
+
+
+class SubdomainEnumerator:
+    """
+    Resolves <word>.<domain> for every word of a (possibly huge) wordlist with
+    a bounded number of concurrent queries. Wildcard DNS is detected first by
+    resolving random labels; names that only resolve to the wildcard
+    addresses are dropped.
+    """
+
+    def __init__(self, resolver=None, concurrency=200, cache=DNS_CACHE, wildcard_probes=3):
+        self.resolver = resolver
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.wildcard_probes = wildcard_probes
+        self.wildcard_addresses = set()
+
+    def enumerate(self, domain, words, on_found=None, should_stop=None):
+        """
+        Returns the sorted list of discovered hostnames. on_found(hostname, addresses) is called as each is found.
+        """
+        return asyncio.run(self._enumerate(domain, words, on_found, should_stop or (lambda: False)))
+
+    async def _lookup(self, resolver, hostname):
+        hit, addresses = self.cache.get(hostname)
+        if hit:
+            return addresses
+        addresses, ttl = await resolver.resolve(hostname)
+        self.cache.put(hostname, addresses, ttl)
+        return addresses
+
+    async def _enumerate(self, domain, words, on_found, should_stop):
+        domain = domain.strip('.').lower()
+        resolver = self.resolver or default_resolver()
+        await resolver.open()
+        try:
+            # Wildcard detection: random labels should never resolve
+            self.wildcard_addresses = set()
+            for _ in range(self.wildcard_probes):
+                addresses = await self._lookup(resolver, f"{random_label()}.{domain}")
+                if addresses:
+                    self.wildcard_addresses.update(addresses)
+
+            found = []
+            word_iter = iter(words)
+            seen = set()
+
+            async def worker():
+                for word in word_iter:
+                    if should_stop():
+                        return
+                    hostname = f"{word}.{domain}"
+                    if hostname in seen:
+                        continue
+                    seen.add(hostname)
+                    try:
+                        addresses = await self._lookup(resolver, hostname)
+                    except Exception:
+                        continue
+                    if not addresses or set(addresses) <= self.wildcard_addresses:
+                        continue
+                    found.append(hostname)
+                    if on_found:
+                        on_found(hostname, addresses)
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            return sorted(found)
+        finally:
+            resolver.close()
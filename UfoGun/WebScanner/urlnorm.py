@@ -0,0 +1,97 @@
+import re
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, unquote
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Path segments that are values rather than routes
+_SEGMENT_PATTERNS = [
+    (re.compile(r'^\d+$'), '{int}'),
+    (re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE), '{uuid}'),
+    (re.compile(r'^[0-9a-f]{16,}$', re.IGNORECASE), '{hex}'),
+    (re.compile(r'^(?=.*\d)[A-Za-z0-9_\-]{20,}$'), '{token}'),
+]
+
+
+def canonicalize(url):
+    """
+    Canonical form of a URL for deduplication: lowercase scheme and host,
+    no default port, no fragment, '/' for an empty path, dot segments
+    resolved, consistent percent-encoding and query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if parts.username:
+        netloc = parts.username + (':' + parts.password if parts.password else '') + '@' + netloc
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc += f':{port}'
+
+    segments = []
+    for segment in parts.path.split('/'):
+        if segment == '..':
+            if len(segments) > 1:
+                segments.pop()
+        elif segment != '.':
+            segments.append(quote(unquote(segment), safe="!$&'()*+,;=:@~"))
+    path = '/'.join(segments) or '/'
+    if not path.startswith('/'):
+        path = '/' + path
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)), quote_via=quote)
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def route_template(path):
+    """
+    Replaces value-like path segments ("/item/42/edit" -> "/item/{int}/edit").
+    """
+    segments = []
+    for segment in path.split('/'):
+        for pattern, placeholder in _SEGMENT_PATTERNS:
+            if pattern.match(segment):
+                segment = placeholder
+                break
+        segments.append(segment)
+    return '/'.join(segments)
+
+
+def cluster_key(url):
+    """
+    (host, route template, parameter names): URLs with the same key run the same code path on the server.
+    """
+    parts = urlsplit(url)
+    names = tuple(sorted(set(name for name, _ in parse_qsl(parts.query, keep_blank_values=True))))
+    return parts.netloc.lower(), route_template(parts.path or '/'), names
+
+
+class UrlClusters:
+    """
+    Admits at most `limit` URLs per cluster (see cluster_key); None admits everything.
+    Thread-safe, and counts what it turned away.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.counts = {}
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def admit(self, url):
+        key = cluster_key(url)
+        with self._lock:
+            count = self.counts.get(key, 0)
+            if self.limit is not None and count >= self.limit:
+                self.skipped += 1
+                return False
+            self.counts[key] = count + 1
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self.counts)
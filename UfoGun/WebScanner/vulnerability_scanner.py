@@ -1,318 +1,327 @@
-import requests
 import re
-import socket
+import hashlib
+import threading
+import ipaddress
 import concurrent.futures
 import sys
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, unquote, parse_qs
+from crawler import AsyncCrawler, conditional_get, page_record
+from urlnorm import canonicalize, UrlClusters
+from metrics import session_span, session_check
+from page_document import get_document
+from http_client import ResponseCache, create_session
+from findings import FindingsCollector
+from probes import ProbeCheck, ProbeEngine, TRANSIENT_ERRORS
+from signatures import scan_response, ChunkMatcher, SIGNATURES
+from discovery import ContentDiscovery, SENSITIVE_WORDLIST, iter_paths
+from subdomains import SubdomainEnumerator, iter_wordlist, DEFAULT_WORDLIST
+
+# --- Parameter injection checks (run by probes.ProbeEngine) ---
+
+REDIRECT_PARAMS = ['url', 'next', 'target', 'dest', 'redirect', 'to', 'go', 'return']
+
+def _match_reflection(res, payload):
+    return payload in res.text
+
+def _match_signature(category):
+    # Signature lists live in signatures.SIGNATURES
+    def matcher(res, payload):
+        matches = scan_response(res, category)
+        return matches[0].signature if matches else None
+    return matcher
+
+def _stop_on_reflection(payload):
+    return ChunkMatcher([payload])
+
+def _stop_on_signature(category):
+    return lambda payload: SIGNATURES.matcher(category)
+
+def _match_template_eval(res, payload):
+    # Logic: evaluated but not reflected literally
+    return "49" in res.text and "7*7" not in res.text
+
+def _match_redirect(res, payload):
+    return res.status_code in [301, 302, 307] and "example.com" in res.headers.get('Location', '')
+
+XSS_PROBE = ProbeCheck(
+    "Reflected XSS (URL)", "high",
+    ["<script>alert('XSS')</script>", "'\"><script>alert(1)</script>", "<img src=x onerror=alert(1)>", "javascript:alert(1)//"],
+    _match_reflection,
+    lambda key, payload, evidence: f"URL parameter '{key}' reflects input without sanitization.",
+    stop_on=_stop_on_reflection
+)
+
+SQLI_PROBE = ProbeCheck(
+    "SQL Injection (Error Based)", "critical",
+    ["'", "\"", "' OR '1'='1", "1' ORDER BY 1--+", "admin' --", "1 UNION SELECT null--"],
+    _match_signature('sqli'),
+    lambda key, payload, evidence: f"Injected '{payload}' caused database error: {evidence}",
+    scope='url',  # Stop after finding one for this URL to avoid noise
+    stop_on=_stop_on_signature('sqli')
+)
+
+LFI_PROBE = ProbeCheck(
+    "Local File Inclusion (LFI)", "critical",
+    ["../../../../etc/passwd", "../../../../windows/win.ini", "....//....//....//etc/passwd", "php://filter/convert.base64-encode/resource=index.php"],
+    _match_signature('lfi'),
+    lambda key, payload, evidence: f"Successfully read system file using payload: {payload}",
+    scope='url',
+    stop_on=_stop_on_signature('lfi')
+)
+
+# Simple, non-destructive payloads with visible feedback (concatenation markers)
+RCE_PROBE = ProbeCheck(
+    "Command Injection (RCE)", "critical",
+    ["; cat /etc/passwd", "| cat /etc/passwd", "`cat /etc/passwd`", "; type C:\\Windows\\win.ini"],
+    _match_signature('rce'),
+    lambda key, payload, evidence: f"Command executed successfully via payload: {payload}",
+    scope='url',
+    stop_on=_stop_on_signature('rce')
+)
+
+# Payloads for Jinja2, Twig, etc. {{7*7}} should render 49
+SSTI_PROBE = ProbeCheck(
+    "Server-Side Template Injection (SSTI)", "high",
+    ["{{7*7}}", "${7*7}", "<%= 7*7 %>", "#{7*7}"],
+    _match_template_eval,
+    lambda key, payload, evidence: f"Template engine evaluated payload: {payload} as 49",
+    scope='url'
+)
+
+# Only likely redirect parameters are tested to save time
+REDIRECT_PROBE = ProbeCheck(
+    "Open Redirect", "medium",
+    ["http://example.com"],
+    _match_redirect,
+    lambda key, payload, evidence: f"Parameter '{key}' allows redirection to arbitrary domains.",
+    param_filter=lambda key: key.lower() in REDIRECT_PARAMS or 'url' in key.lower(),
+    needs_value=False,
+    # Decided on the status and Location header alone, so the body is not read
+    request_kwargs={"allow_redirects": False, "max_bytes": 0}
+)
+
+# Ordered by value: with a scan budget the critical checks are probed first
+PARAM_CHECKS = [SQLI_PROBE, LFI_PROBE, RCE_PROBE, XSS_PROBE, SSTI_PROBE, REDIRECT_PROBE]
+
+FORM_XSS_PAYLOAD = "<script>confirm(1)</script>"
+
+# Stored with every page state: when the active checks change, unchanged pages are probed again
+CHECKS_VERSION = hashlib.sha1(repr(
+    [(check.title, check.payloads) for check in PARAM_CHECKS] + [FORM_XSS_PAYLOAD]
+).encode()).hexdigest()[:12]
 
 class AdvancedScanner:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-        })
-        self.vulnerabilities = []
+    # Crawl concurrency and limits
+    crawl_workers = 10
+    crawl_per_host = 4
+    crawl_max_pages = 500
+    # URLs followed / probed per cluster (same route template and parameter names, see urlnorm.py)
+    crawl_per_cluster = 50
+    probe_per_cluster = 3
+    # Parallel page scans in perform_scan
+    page_workers = 5
+    # Concurrent parameter probes shared by all page workers
+    probe_workers = 20
+    # Subdomain enumeration
+    subdomain_wordlist = DEFAULT_WORDLIST
+    subdomain_concurrency = 200
+    # Content discovery (discovery.py); extensions are tried on names without one
+    sensitive_wordlist = SENSITIVE_WORDLIST
+    discovery_extensions = ()
+    discovery_workers = 10
+
+    @classmethod
+    def pool_size(cls):
+        """
+        Connections per host needed so no worker waits on the connection pool.
+        """
+        return max(cls.crawl_workers, cls.page_workers + cls.probe_workers, cls.discovery_workers)
+
+    def __init__(self, cache=None, session=None, cancel_event=None, on_finding=None, previous_pages=None):
+        # The session (and its response cache) may be shared with the caller (server.run_scan)
+        if session is None:
+            session = create_session(pool_size=self.pool_size(), cache=cache if cache is not None else ResponseCache())
+        self.session = session
+        self.cache = session.cache
+        # Scan deadline / request budget carried by the session (budget.ScanBudget), if any
+        self.budget = getattr(session, 'budget', None)
+        self.cancel_event = cancel_event
+        # Called with each finding as soon as it is logged (live scan streaming)
+        self.on_finding = on_finding
+        self.findings = FindingsCollector()
+        self.probes = ProbeEngine(self.session, max_workers=self.probe_workers, should_stop=self.should_stop)
+        # Path discovery for this scan; the caller runs its own lists through it too (server.check_admin_pages)
+        self.discovery = ContentDiscovery(self.session, max_workers=self.discovery_workers, should_stop=self.should_stop)
+        # Incremental rescans: page states of the last completed scan (database.get_page_states)
+        # and the states of this scan, saved by the caller once the scan completes
+        self.previous_pages = previous_pages or {}
+        self.pages = {}
+        self.page_states = {}
+        self.unchanged_pages = []
+        self.clustered_pages = 0
+        self._page_findings = {}
+        self._pages_lock = threading.Lock()
+
+    def should_stop(self):
+        if self.budget is not None and self.budget.exhausted:
+            return True
+        return self.cancel_event is not None and self.cancel_event.is_set()
     
-    def log_vuln(self, title, severity, desc, path):
-        self.vulnerabilities.append({
+    @property
+    def vulnerabilities(self):
+        return self.findings.as_list()
+
+    def log_vuln(self, title, severity, desc, path, param=None, page=None, carried_forward=False):
+        finding = {
             "title": title,
             "severity": severity,
             "desc": desc,
             "path": path
-        })
+        }
+        if page:
+            # Remembered per page so an unchanged page can carry it forward next time
+            with self._pages_lock:
+                self._page_findings.setdefault(page, []).append(dict(finding, param=param) if param else finding)
+        if carried_forward:
+            finding = dict(finding, carriedForward=True)
+        finding, is_new = self.findings.add(finding, param=param)
+        # Repeats only bump the occurrence count of the stored finding
+        if is_new and self.on_finding:
+            self.on_finding(finding)
 
-    def crawl(self, start_url, max_depth=1):
+    def crawl(self, start_url, max_depth=1, max_pages=None):
         """
         Crawls the website to find internal links.
         Returns a set of unique internal URLs.
         """
-        visited = set()
-        to_visit = [(start_url, 0)]
-        internal_urls = set()
-        domain = urlparse(start_url).netloc
-        
-        while to_visit:
-            url, depth = to_visit.pop(0)
-            if url in visited:
-                continue
-            visited.add(url)
-            internal_urls.add(url)
-            
-            if depth >= max_depth:
-                continue
-                
-            try:
-                if not url.startswith(('http', 'https')): continue
-                response = self.session.get(url, timeout=5)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    full_url = urljoin(url, href)
-                    parsed_link = urlparse(full_url)
-                    
-                    # Only internal links
-                    if parsed_link.netloc == domain or parsed_link.netloc == '':
-                        # Avoid duplicates and static assets
-                        if full_url not in visited and not full_url.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.css', '.js', '.pdf')):
-                            to_visit.append((full_url, depth + 1))
-                            
-            except:
-                pass
-                
-        return internal_urls
+        crawler = AsyncCrawler(
+            self.session,
+            max_workers=self.crawl_workers,
+            per_host_limit=self.crawl_per_host,
+            max_depth=max_depth,
+            max_pages=max_pages or self.crawl_max_pages,
+            should_stop=self.should_stop,
+            page_states=self.previous_pages,
+            per_cluster=self.crawl_per_cluster
+        )
+        urls = crawler.crawl(start_url)
+        self.pages.update(crawler.pages)
+        return urls
+
+    def probe_params(self, url, checks):
+        """
+        Runs URL parameter injection checks through the shared probe engine.
+        Returns False when any probe failed on a timeout / connection error.
+        """
+        errors = []
+        for hit in self.probes.run(url, checks, errors):
+            self.log_vuln(
+                hit.check.title,
+                hit.check.severity,
+                hit.check.describe(hit.key, hit.payload, hit.evidence),
+                hit.url,
+                param=hit.key,
+                page=url
+            )
+        return not errors
 
     def scan_xss(self, url, html_content):
         """
         Reflected XSS Scanner
         """
         # 1. URL Parameter XSS
-        parsed = urlparse(url)
-        if parsed.query:
-            payloads = [
-                "<script>alert('XSS')</script>", 
-                "'\"><script>alert(1)</script>", 
-                "<img src=x onerror=alert(1)>",
-                "javascript:alert(1)//"
-            ]
-            for param in parsed.query.split('&'):
-                if '=' in param:
-                    key = param.split('=')[0]
-                    for payload in payloads:
-                        try:
-                            # Construct new URL with payload
-                            test_query = parsed.query.replace(param, f"{key}={payload}")
-                            test_url = parsed._replace(query=test_query).geturl()
-                            res = self.session.get(test_url, timeout=3)
-                            
-                            if payload in res.text:
-                                self.log_vuln(
-                                    "Reflected XSS (URL)",
-                                    "high",
-                                    f"URL parameter '{key}' reflects input without sanitization.",
-                                    test_url
-                                )
-                                break
-                        except: pass
+        self.probe_params(url, [XSS_PROBE])
 
         # 2. Form XSS
-        soup = BeautifulSoup(html_content, 'html.parser')
-        forms = soup.find_all('form')
-        for form in forms:
-            action = form.get('action', '')
-            method = form.get('method', 'get').upper()
-            full_action = urljoin(url, action)
-            inputs = form.find_all('input')
+        self.scan_form_xss(url, html_content)
+
+    def scan_form_xss(self, url, html_content):
+        """
+        Reflected XSS through the forms of a page.
+        Returns False when a form submission failed on a timeout / connection error.
+        """
+        complete = True
+        doc = get_document(url, html_content)
+        for form in doc.forms:
+            method = form["method"]
+            full_action = urljoin(url, form["action"])
             
-            payload = "<script>confirm(1)</script>"
+            payload = FORM_XSS_PAYLOAD
             data = {}
-            for inp in inputs:
-                name = inp.get('name')
+            for inp in form["inputs"]:
+                name = inp["name"]
                 if name:
-                    input_type = inp.get('type', 'text')
+                    input_type = inp["type"] or 'text'
                     if input_type in ['text', 'search', 'url', 'email', 'password', 'hidden']:
                          data[name] = payload
             
             if data:
                 try:
-                    if method == 'POST':
-                        res = self.session.post(full_action, data=data, timeout=3)
-                    else:
-                        res = self.session.get(full_action, params=data, timeout=3)
+                    with session_check(self.session, "Reflected XSS (Form)"):
+                        if method == 'POST':
+                            res = self.session.post(full_action, data=data, timeout=3, stop=ChunkMatcher([payload]))
+                        else:
+                            res = self.session.get(full_action, params=data, timeout=3, stop=ChunkMatcher([payload]))
                     
                     if payload in res.text:
                          self.log_vuln(
                             f"Reflected XSS (Form Method: {method})",
                             "high",
                             f"Form at {full_action} reflects malicious script input.",
-                            full_action
+                            full_action,
+                            page=url
                         )
-                except: pass
+                except TRANSIENT_ERRORS:
+                    complete = False
+                except Exception:
+                    pass
+        return complete
 
     def scan_sqli(self, url, html_content):
         """
         SQL Injection Scanner
         """
-        error_signatures = [
-            "you have an error in your sql syntax",
-            "warning: mysql",
-            "unclosed quotation mark after the character string",
-            "quoted string not properly terminated",
-            "sql syntax error",
-            "pg_query(): query failed: error"
-        ]
-        
-        # 1. Parameter SQLi
-        parsed = urlparse(url)
-        if parsed.query:
-            sqli_payloads = ["'", "\"", "' OR '1'='1", "1' ORDER BY 1--+", "admin' --", "1 UNION SELECT null--"]
-            
-            for param in parsed.query.split('&'):
-                if '=' in param:
-                    key = param.split('=')[0]
-                    for payload in sqli_payloads:
-                        try:
-                             # Construct new URL with payload
-                            test_query = parsed.query.replace(param, f"{key}={payload}")
-                            test_url = parsed._replace(query=test_query).geturl()
-                            res = self.session.get(test_url, timeout=3)
-                            
-                            # Check response for errors
-                            for err in error_signatures:
-                                if err.lower() in res.text.lower():
-                                    self.log_vuln(
-                                        "SQL Injection (Error Based)",
-                                        "critical",
-                                        f"Injected '{payload}' caused database error: {err}",
-                                        test_url
-                                    )
-                                    # Detect Blind SQLi (simple boolean check improvement) - skipped for speed
-                                    return # Stop after finding one for this URL to avoid noise
-                        except: pass
-
+        self.probe_params(url, [SQLI_PROBE])
 
     def check_lfi(self, url):
         """
         Local File Inclusion (LFI) Scanner
         """
-        parsed = urlparse(url)
-        if parsed.query:
-            payloads = [
-                "../../../../etc/passwd",
-                "../../../../windows/win.ini",
-                "....//....//....//etc/passwd",
-                "php://filter/convert.base64-encode/resource=index.php"
-            ]
-            
-            for param in parsed.query.split('&'):
-                if '=' in param:
-                    key = param.split('=')[0]
-                    for payload in payloads:
-                        try:
-                            # Construct new URL with payload
-                            test_query = parsed.query.replace(param, f"{key}={payload}")
-                            test_url = parsed._replace(query=test_query).geturl()
-                            res = self.session.get(test_url, timeout=3)
-                            
-                            if "root:x:0:0" in res.text or "[extensions]" in res.text or "[fonts]" in res.text:
-                                self.log_vuln(
-                                    "Local File Inclusion (LFI)",
-                                    "critical",
-                                    f"Successfully read system file using payload: {payload}",
-                                    test_url
-                                )
-                                return
-                        except: pass
+        self.probe_params(url, [LFI_PROBE])
 
     def check_rce(self, url):
         """
         Remote Code Execution (RCE) / Command Injection Scanner
         """
-        parsed = urlparse(url)
-        if parsed.query:
-            # Simple, non-destructive payloads (sleep/id/whoami) usually require time-based or visible feedback
-            # We will use simple concatenation markers
-            payloads = [
-                "; cat /etc/passwd", 
-                "| cat /etc/passwd", 
-                "`cat /etc/passwd`",
-                "; type C:\\Windows\\win.ini"
-            ]
-            
-            for param in parsed.query.split('&'):
-                if '=' in param:
-                    key = param.split('=')[0]
-                    for payload in payloads:
-                        try:
-                            test_query = parsed.query.replace(param, f"{key}={payload}")
-                            test_url = parsed._replace(query=test_query).geturl()
-                            res = self.session.get(test_url, timeout=3)
-                            
-                            if "root:x:0:0" in res.text or "[extensions]" in res.text:
-                                self.log_vuln(
-                                    "Command Injection (RCE)",
-                                    "critical",
-                                    f"Command executed successfully via payload: {payload}",
-                                    test_url
-                                )
-                                return
-                        except: pass
+        self.probe_params(url, [RCE_PROBE])
 
     def check_ssti(self, url, html_content):
         """
         Server-Side Template Injection (SSTI) Scanner
         """
-        parsed = urlparse(url)
-        if parsed.query:
-            # Payloads for Jinja2, Twig, etc. {{7*7}} should render 49
-            payloads = ["{{7*7}}", "${7*7}", "<%= 7*7 %>", "#{7*7}"]
-            
-            for param in parsed.query.split('&'):
-                if '=' in param:
-                    key = param.split('=')[0]
-                    for payload in payloads:
-                        try:
-                            test_query = parsed.query.replace(param, f"{key}={payload}")
-                            test_url = parsed._replace(query=test_query).geturl()
-                            res = self.session.get(test_url, timeout=3)
-                            
-                            if "49" in res.text and "7*7" not in res.text: # Logic: evaluated but not reflected literally
-                                self.log_vuln(
-                                    "Server-Side Template Injection (SSTI)",
-                                    "high",
-                                    f"Template engine evaluated payload: {payload} as 49",
-                                    test_url
-                                )
-                                return
-                        except: pass
+        self.probe_params(url, [SSTI_PROBE])
 
     def check_open_redirect(self, url):
         """
         Open Redirect Scanner
         """
-        parsed = urlparse(url)
-        if parsed.query:
-            payload = "http://example.com"
-            redirect_params = ['url', 'next', 'target', 'dest', 'redirect', 'to', 'go', 'return']
-            
-            for param in parsed.query.split('&'):
-                key = param.split('=')[0]
-                # Only test likely redirect parameters to save time
-                if key.lower() in redirect_params or 'url' in key.lower():
-                    try:
-                        test_query = parsed.query.replace(param, f"{key}={payload}")
-                        test_url = parsed._replace(query=test_query).geturl()
-                        res = self.session.get(test_url, allow_redirects=False, timeout=3)
-                        
-                        if res.status_code in [301, 302, 307] and "example.com" in res.headers.get('Location', ''):
-                            self.log_vuln(
-                                "Open Redirect",
-                                "medium",
-                                f"Parameter '{key}' allows redirection to arbitrary domains.",
-                                test_url
-                            )
-                    except: pass
+        self.probe_params(url, [REDIRECT_PROBE])
 
     def extract_js_endpoints(self, url, html_content):
         """
         Extracts API endpoints and interesting URLs from JS files
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        scripts = soup.find_all('script', src=True)
+        doc = get_document(url, html_content)
         
         found_endpoints = set()
         
-        for script in scripts:
-            src = script.get('src')
-            if not src: continue
-            
+        for src in doc.script_srcs:
             full_url = urljoin(url, src)
             try:
                 # Only scan internal JS
                 if urlparse(full_url).netloc == urlparse(url).netloc:
-                    res = self.session.get(full_url, timeout=3)
+                    with session_check(self.session, "JS Endpoint Discovery"):
+                        res = self.session.get(full_url, timeout=3)
                     content = res.text
                     
                     # Regex for finding relative paths/api endpoints in code
@@ -331,79 +340,53 @@ class AdvancedScanner:
                 f"JS Endpoint Discovery ({len(found_endpoints)})",
                 "info",
                 "Found hidden endpoints in JavaScript files: " + ", ".join(list(found_endpoints)[:10]),
-                url
+                url,
+                page=url
             )
 
 
     def check_sensitive_files(self, base_url):
         """
-        Expanded sensitive file checker (Fuzzing)
-        """
-        files = [
-            # Git / Version Control
-            '.git/config', '.git/HEAD', '.svn/entries',
-            # Environment / Config
-            '.env', 'config.php.bak', 'web.config', 'settings.py', 'config.js',
-            # Backups
-            'backup.sql', 'db_dump.sql', 'users.sql', 'www.zip', 'site.tar.gz', 'backup.zip',
-            # System
-            'robots.txt', 'sitemap.xml', 'phpinfo.php', '.htaccess',
-            # Logs
-            'error_log', 'access.log', 'php_errors.log'
-        ]
-        
-        for file in files:
-            try:
-                full_url = urljoin(base_url.rstrip('/') + '/', file)
-                res = self.session.head(full_url, timeout=2) # HEAD request for speed
-                
-                if res.status_code == 200:
-                    # Double check with GET for small files to confirm it's not a custom 404 page returning 200
-                    if file.endswith(('.php', '.txt', '.log')):
-                        r_get = self.session.get(full_url, timeout=2)
-                        # Filter out soft 404s (pages that say "not found" but return 200)
-                        if "not found" in r_get.text.lower() or "error" in r_get.title.string.lower() if r_get.title else False:
-                             continue
-                             
-                    severity = "medium"
-                    if file in ['.env', '.git/config', 'backup.sql']: severity = "critical"
-                    if file in ['robots.txt', 'sitemap.xml']: severity = "info"
-                    
-                    self.log_vuln(
-                        f"Sensitive File Found: {file}",
-                        severity,
-                        f"File accessible at {full_url}",
-                        full_url
-                    )
-            except: pass
+        Sensitive file discovery (Fuzzing) with the sensitive_wordlist (see discovery.py)
+        """
+        try:
+            entries = iter_paths(self.sensitive_wordlist, self.discovery_extensions)
+            for hit in self.discovery.run(base_url, entries, label="Sensitive Files"):
+                self.log_vuln(
+                    f"Sensitive File Found: {hit.path}",
+                    hit.severity,
+                    f"File accessible at {hit.url}",
+                    hit.url
+                )
+        except OSError:
+            # Unreadable wordlist
+            pass
 
     def check_subdomains(self, domain):
         """
-        Subdomain Enumeration (Brute-force common subdomains)
+        Subdomain Enumeration (wordlist brute-force, see subdomains.py)
         """
-        subdomains = [
-            "www", "mail", "ftp", "localhost", "webmail", "smtp", "pop", "ns1", "webdisk", "ns2",
-            "cpanel", "whm", "autodiscover", "autoconfig", "m", "imap", "test", "ns", "blog",
-            "pop3", "dev", "www2", "admin", "forum", "news", "email", "ns3", "mail2", "ne1",
-            "apps", "api", "mobile", "beta", "shop", "store", "secure", "vpn", "remote"
-        ]
-        
-        found_subs = []
-        
-        def resolve_sub(sub):
-            hostname = f"{sub}.{domain}"
-            try:
-                # Fast timeout DNS check
-                socket.gethostbyname(hostname)
-                return hostname
-            except:
-                return None
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            results = executor.map(resolve_sub, subdomains)
-            
-        for r in results:
-            if r: found_subs.append(r)
+        domain = domain.split(':')[0].strip('[]')
+        try:
+            # IP targets have no subdomains
+            ipaddress.ip_address(domain)
+            return
+        except ValueError:
+            pass
+
+        enumerator = SubdomainEnumerator(concurrency=self.subdomain_concurrency)
+        try:
+            found_subs = enumerator.enumerate(domain, iter_wordlist(self.subdomain_wordlist), should_stop=self.should_stop)
+        except Exception:
+            return
+
+        if enumerator.wildcard_addresses:
+            self.log_vuln(
+                "Wildcard DNS",
+                "info",
+                f"*.{domain} resolves to {', '.join(sorted(enumerator.wildcard_addresses))}; matching names were ignored.",
+                "DNS Enumeration"
+            )
             
         if found_subs:
             self.log_vuln(
@@ -417,28 +400,73 @@ class AdvancedScanner:
         """
         Thread worker function to scan a single page
         """
+        if self.should_stop():
+            return
         try:
-            if initial_content:
-                content = initial_content
+            probed = True
+            previous = self.previous_pages.get(url)
+            page = self.pages.get(url)
+            if page is None:
+                # Not fetched by the crawler (last depth level)
+                with session_check(self.session, "Page Fetch"):
+                    res, unchanged = conditional_get(self.session, url, previous, timeout=5)
+                page = self.pages[url] = page_record(res, None, unchanged, previous)
+
+            if self.is_unchanged(url):
+                self.carry_forward(url)
             else:
-                res = self.session.get(url, timeout=5)
-                content = res.text
-            
-            # Run all active scans on this page
-            self.scan_xss(url, content)
-            self.scan_sqli(url, content)
-            self.check_lfi(url)
-            self.check_rce(url)
-            self.check_ssti(url, content)
-            self.check_open_redirect(url)
-            
-            # JS Extraction only on 'main' pages or app roots (heuristically) to avoid noise
-            if initial_content: 
-                self.extract_js_endpoints(url, content)
+                if initial_content:
+                    content = initial_content
+                else:
+                    # Usually answered by the response cache (fetched during the crawl)
+                    with session_check(self.session, "Page Fetch"):
+                        res = self.session.get(url, timeout=5)
+                    content = res.text
+
+                # Run all active scans on this page; parameter probes run concurrently
+                probed = self.probe_params(url, PARAM_CHECKS)
+                probed = self.scan_form_xss(url, content) and probed
+
+                # JS Extraction only on 'main' pages or app roots (heuristically) to avoid noise
+                if initial_content:
+                    self.extract_js_endpoints(url, content)
+
+            # A page whose probes failed is not a clean baseline: leave it to be probed again next time
+            if probed and not self.should_stop():
+                self.record_page_state(url, page)
                 
         except Exception as e:
             pass
 
+    def is_unchanged(self, url):
+        """
+        True when the page did not change since the last completed scan with the same checks.
+        """
+        page = self.pages.get(url)
+        previous = self.previous_pages.get(url)
+        return bool(page and page["unchanged"] and previous
+                    and previous.get("checks") == CHECKS_VERSION and previous.get("findings") is not None)
+
+    def carry_forward(self, url):
+        """
+        Re-reports the findings of an unchanged page without probing it again.
+        """
+        with self._pages_lock:
+            self.unchanged_pages.append(url)
+        for f in self.previous_pages[url]["findings"]:
+            self.log_vuln(f["title"], f["severity"], f.get("desc"), f.get("path"), param=f.get("param"), page=url, carried_forward=True)
+
+    def record_page_state(self, url, page):
+        with self._pages_lock:
+            self.page_states[url] = {
+                "etag": page["etag"],
+                "last_modified": page["last_modified"],
+                "hash": page["hash"],
+                "links": page["links"],
+                "checks": CHECKS_VERSION,
+                "findings": list(self._page_findings.get(url, []))
+            }
+
     def perform_scan(self, target_url):
         # 0. Initial Check
         try:
@@ -447,35 +475,58 @@ class AdvancedScanner:
         except Exception as e:
             return {"error": str(e)}
 
+        if self.should_stop():
+            return self.vulnerabilities
+
         # 1. Crawl (Shallow) - Find interesting internal pages
-        crawled_urls = self.crawl(target_url, max_depth=2) # Increased depth
+        with session_span(self.session, "deep_scan.crawl"):
+            crawled_urls = self.crawl(target_url, max_depth=2) # Increased depth
         if target_url not in crawled_urls:
             crawled_urls.add(target_url)
 
-        # 2. Parallel Scanning
-        # We start the scan for the homepage immediately, then threads for others
-        self.scan_page_worker(target_url, initial_content)
-        
-        # Remove homepage from set to avoid double scan if it was added
-        if target_url in crawled_urls:
-             crawled_urls.remove(target_url)
-             
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # Submit tasks
-            future_to_url = {executor.submit(self.scan_page_worker, url): url for url in crawled_urls}
-            
-            for future in concurrent.futures.as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    future.result()
-                except: pass
+        # Pages of one cluster produce the same findings: probe only a few representatives
+        representatives = UrlClusters(self.probe_per_cluster)
+        representatives.admit(canonicalize(target_url))
+        crawled_urls = set(url for url in sorted(crawled_urls) if url == target_url or representatives.admit(url))
+        self.clustered_pages = representatives.skipped
+
+        # 2. Global Checks (only on base URL): a few requests that can find critical files,
+        # so they run before the page probes when the scan has a budget
+        with session_span(self.session, "deep_scan.sensitive_files"):
+            self.check_sensitive_files(target_url)
+
+        if self.should_stop():
+            return self.vulnerabilities
+
+        # 3. Parallel Scanning
+        with session_span(self.session, "deep_scan.pages"):
+            # We start the scan for the homepage immediately, then threads for others
+            self.scan_page_worker(target_url, initial_content)
+
+            # Remove homepage from set to avoid double scan if it was added
+            if target_url in crawled_urls:
+                 crawled_urls.remove(target_url)
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+                # Submit tasks
+                future_to_url = {executor.submit(self.scan_page_worker, url): url for url in crawled_urls}
+
+                for future in concurrent.futures.as_completed(future_to_url):
+                    url = future_to_url[future]
+                    try:
+                        future.result()
+                    except: pass
+
+        # Page probing is done; release the probe threads
+        self.probes.close()
+
+        if self.should_stop():
+            return self.vulnerabilities
 
-        # 3. Global Checks (only on base URL)
-        self.check_sensitive_files(target_url)
-        
         # 4. Subdomain Scan
         domain = urlparse(target_url).netloc
-        self.check_subdomains(domain)
+        with session_span(self.session, "deep_scan.subdomains"), session_check(self.session, "Subdomains"):
+            self.check_subdomains(domain)
 
         return self.vulnerabilities
 